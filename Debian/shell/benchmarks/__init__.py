@@ -0,0 +1,4 @@
+"""
+Benchmarks Package.
+Offline measurements of the shell's hot paths.
+"""
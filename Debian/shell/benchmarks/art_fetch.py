@@ -0,0 +1,196 @@
+"""
+Remote album art fetching against a local HTTP stand-in server.
+
+Runs the ArtFetcher behind the album art service against an aiohttp
+server on localhost. Cold and cached fetch latency are reported, along
+with checks for request coalescing, connection reuse, the persisted url
+index, size limits, timeouts and error responses.
+
+    python -m benchmarks.art_fetch
+    python -m benchmarks.art_fetch --fetches 200 --size 2000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from aiohttp import web
+from loguru import logger
+
+from util.art_fetcher import ArtFetcher
+
+CONNECTIONS = 4
+TIMEOUT = 1.0  # seconds
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+class StandInServer:
+    """Serves covers the way an artwork CDN would, plus a few bad endpoints."""
+
+    def __init__(self, payload_size: int, max_size: int):
+        self.payload = os.urandom(payload_size)
+        self.max_size = max_size
+        self.requests: Counter[str] = Counter()
+        self.connections: set = set()
+
+        app = web.Application()
+        app.router.add_get("/cover/{name}", self.cover)
+        app.router.add_get("/oversized", self.oversized)
+        app.router.add_get("/slow", self.slow)
+        self.runner = web.AppRunner(app)
+
+    async def start(self) -> str:
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def record(self, request: web.Request):
+        self.requests[request.path] += 1
+        self.connections.add(request.transport.get_extra_info("peername"))
+
+    async def cover(self, request: web.Request) -> web.Response:
+        self.record(request)
+        name = request.match_info["name"]
+        if name == "missing":
+            raise web.HTTPNotFound()
+        # every name is a different image, so blobs are not deduplicated
+        return web.Response(body=self.payload + name.encode(), content_type="image/png")
+
+    async def oversized(self, request: web.Request) -> web.StreamResponse:
+        """Streams past the limit without announcing a length."""
+        self.record(request)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        chunk = bytes(64 * 1024)
+        sent = 0
+        try:
+            while sent <= self.max_size:
+                await response.write(chunk)
+                sent += len(chunk)
+        except ConnectionError:
+            pass
+        return response
+
+    async def slow(self, request: web.Request) -> web.Response:
+        self.record(request)
+        await asyncio.sleep(TIMEOUT * 3)
+        return web.Response(body=self.payload, content_type="image/png")
+
+
+async def run(fetches: int, payload_size: int) -> bool:
+    max_size = payload_size * 4
+    server = StandInServer(payload_size, max_size)
+    base_url = await server.start()
+    urls = [f"{base_url}/cover/{index}" for index in range(fetches)]
+    checks: dict[str, bool] = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        def create_fetcher() -> ArtFetcher:
+            return ArtFetcher(
+                Path(directory),
+                max_size=max_size,
+                timeout=TIMEOUT,
+                connections=CONNECTIONS,
+                cache_size=fetches * payload_size * 2,
+            )
+
+        fetcher = create_fetcher()
+
+        cold = []
+        for url in urls:
+            start = time.perf_counter()
+            path = await fetcher.fetch(url)
+            cold.append((time.perf_counter() - start) * 1000)
+            if path is None:
+                checks["cold fetches"] = False
+
+        checks.setdefault("cold fetches", True)
+        checks["content addressed"] = (
+            await fetcher.fetch(urls[0])
+        ).read_bytes() == server.payload + b"0"
+
+        warm = []
+        for url in urls:
+            start = time.perf_counter()
+            await fetcher.fetch(url)
+            warm.append((time.perf_counter() - start) * 1000)
+
+        checks["cached fetches skip the network"] = all(
+            server.requests[f"/cover/{index}"] == 1 for index in range(fetches)
+        )
+
+        shared_url = f"{base_url}/cover/shared"
+        paths = await asyncio.gather(*(fetcher.fetch(shared_url) for _ in range(20)))
+        checks["concurrent fetches coalesce"] = (
+            server.requests["/cover/shared"] == 1 and len(set(paths)) == 1
+        )
+
+        checks["connections reused"] = len(server.connections) <= CONNECTIONS
+
+        checks["missing art rejected"] = (
+            await fetcher.fetch(f"{base_url}/cover/missing") is None
+        )
+
+        checks["oversized art rejected"] = (
+            await fetcher.fetch(f"{base_url}/oversized") is None
+        )
+
+        start = time.perf_counter()
+        timed_out = await fetcher.fetch(f"{base_url}/slow") is None
+        elapsed = time.perf_counter() - start
+        checks["slow server times out"] = timed_out and elapsed < TIMEOUT * 2
+
+        await fetcher.close()
+
+        # a fresh fetcher, like a shell restart, reads the persisted index
+        restarted = create_fetcher()
+        await restarted.fetch(urls[0])
+        checks["index survives restart"] = server.requests["/cover/0"] == 1
+        await restarted.close()
+
+    await server.stop()
+
+    print(f"fetches      {fetches} x {payload_size} bytes")
+    print(f"cold p50     {percentile(cold, 50):.3f} ms")
+    print(f"cold p95     {percentile(cold, 95):.3f} ms")
+    print(f"cold mean    {statistics.fmean(cold):.3f} ms")
+    print(f"cached p50   {percentile(warm, 50):.3f} ms")
+    print(f"cached p95   {percentile(warm, 95):.3f} ms")
+    print(f"connections  {len(server.connections)}")
+    for name, passed in checks.items():
+        print(f"{'ok' if passed else 'FAILED':<12} {name}")
+
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fetches", type=int, default=100)
+    parser.add_argument("--size", type=int, default=500_000, help="cover size in bytes")
+    args = parser.parse_args()
+
+    # failures are expected here, the checks report them
+    logger.disable("util.art_fetcher")
+
+    if not asyncio.run(run(args.fetches, args.size)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
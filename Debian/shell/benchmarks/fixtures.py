@@ -0,0 +1,128 @@
+"""
+Synthetic /proc and sysfs trees plus a stub NVML module so the sampling
+layer can be measured on any Linux box.
+"""
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+
+DISKS = ("nvme0n1", "sda")
+PARTITIONS = ("nvme0n1p1", "nvme0n1p2", "sda1")
+
+MEMINFO_TOTAL = 32 * 1024 * 1024  # kB
+
+
+class FakeSystem:
+    """
+    Writes a fake proc and sysfs tree under root. Call advance between
+    samples so counters move like they would on a busy machine.
+    """
+
+    def __init__(self, root: str, cores: int = 8):
+        self.root = root
+        self.proc_root = os.path.join(root, "proc")
+        self.sysfs_root = os.path.join(root, "sys")
+        self.gpu_device_path = os.path.join(
+            self.sysfs_root, "class/drm/card0/device"
+        )
+        self.cores = cores
+
+        self._tick = 0
+
+        os.makedirs(os.path.join(self.proc_root, "self"), exist_ok=True)
+        os.makedirs(self.gpu_device_path, exist_ok=True)
+        for name in DISKS + PARTITIONS:
+            os.makedirs(os.path.join(self.sysfs_root, "class/block", name), exist_ok=True)
+        for name in PARTITIONS:
+            self.write(os.path.join(self.sysfs_root, "class/block", name, "partition"), "1\n")
+
+        self.write(
+            os.path.join(self.proc_root, "self/mounts"),
+            f"/dev/nvme0n1p2 / ext4 rw,relatime 0 0\n"
+            f"/dev/sda1 {root} ext4 rw,relatime 0 0\n",
+        )
+        self.write(
+            os.path.join(self.gpu_device_path, "mem_info_vram_total"),
+            f"{8 * 1024**3}\n",
+        )
+
+        self.advance()
+
+    def write(self, path: str, content: str) -> None:
+        # rewrite in place so samplers holding the fd see new content
+        with open(path, "w") as file:
+            file.write(content)
+
+    def advance(self) -> None:
+        self._tick += 1
+        tick = self._tick
+
+        def cpu_line(name: str, offset: int) -> str:
+            busy = tick * (40 + offset * 7 % 50)
+            idle = tick * (60 - offset * 7 % 50) + 100
+            return f"{name} {busy} 0 {busy // 4} {idle} {tick} 0 {tick // 2} 0 0 0"
+
+        stat = [cpu_line("cpu", 0)]
+        stat += [cpu_line(f"cpu{core}", core + 1) for core in range(self.cores)]
+        stat += [
+            "intr 123456 " + " ".join("0" for _ in range(256)),
+            f"ctxt {tick * 1000}",
+            "btime 1700000000",
+            f"processes {tick}",
+            "procs_running 2",
+            "procs_blocked 0",
+        ]
+        self.write(os.path.join(self.proc_root, "stat"), "\n".join(stat) + "\n")
+
+        available = MEMINFO_TOTAL // 2 + (tick % 100) * 1024
+        self.write(
+            os.path.join(self.proc_root, "meminfo"),
+            f"MemTotal:       {MEMINFO_TOTAL} kB\n"
+            f"MemFree:        {available // 2} kB\n"
+            f"MemAvailable:   {available} kB\n"
+            "Buffers:          123456 kB\n"
+            "Cached:          4567890 kB\n"
+            "SwapCached:            0 kB\n",
+        )
+
+        diskstats = []
+        for index, name in enumerate(DISKS + PARTITIONS):
+            sectors = tick * 2048 * (index + 1)
+            diskstats.append(
+                f" 259 {index} {name} {tick} 0 {sectors} 10 {tick} 0 {sectors // 2}"
+                " 20 0 30 30 0 0 0 0 0 0"
+            )
+        self.write(
+            os.path.join(self.proc_root, "diskstats"), "\n".join(diskstats) + "\n"
+        )
+
+        self.write(
+            os.path.join(self.gpu_device_path, "gpu_busy_percent"), f"{tick % 100}\n"
+        )
+        self.write(
+            os.path.join(self.gpu_device_path, "mem_info_vram_used"),
+            f"{(tick % 8) * 1024**3}\n",
+        )
+
+
+def install_stub_nvml() -> types.ModuleType:
+    """Registers a minimal pynvml stand-in, returning the module."""
+    nvml = types.ModuleType("pynvml")
+    state = {"tick": 0}
+
+    def get_utilization_rates(handle):
+        state["tick"] += 1
+        return SimpleNamespace(gpu=state["tick"] % 100, memory=0)
+
+    nvml.nvmlInit = lambda: None
+    nvml.nvmlShutdown = lambda: None
+    nvml.nvmlDeviceGetHandleByIndex = lambda index: SimpleNamespace(index=index)
+    nvml.nvmlDeviceGetUtilizationRates = get_utilization_rates
+    nvml.nvmlDeviceGetMemoryInfo = lambda handle: SimpleNamespace(
+        used=2 * 1024**3, total=8 * 1024**3, free=6 * 1024**3
+    )
+
+    sys.modules["pynvml"] = nvml
+    return nvml
@@ -0,0 +1,173 @@
+"""
+In-process stand-in for the parts of pulsectl the audio service uses.
+Volume writes through any connection are applied to one fake null sink
+and broadcast as change events to every listening connection.
+"""
+import sys
+import threading
+import types
+from collections import deque
+from types import SimpleNamespace
+
+
+class PulseError(Exception): ...
+
+
+class PulseIndexError(PulseError): ...
+
+
+class PulseOperationFailed(PulseError): ...
+
+
+class PulseDisconnected(PulseError): ...
+
+
+class PulseLoopStop(Exception): ...
+
+
+class PulseVolumeInfo:
+    def __init__(self, value: float, channels: int = 2):
+        self.values = [value] * channels
+
+    @property
+    def value_flat(self) -> float:
+        return sum(self.values) / len(self.values)
+
+
+class FakeServer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections: list["Pulse"] = []
+        self.volume = PulseVolumeInfo(0.5)
+        self.mute = False
+
+    def get_sink(self):
+        with self.lock:
+            return SimpleNamespace(
+                index=0,
+                name="null",
+                description="Null Output",
+                volume=PulseVolumeInfo(self.volume.value_flat),
+                mute=self.mute,
+                proplist={},
+                port_active=None,
+            )
+
+    def update(self, volume: PulseVolumeInfo | None = None, mute: bool | None = None):
+        with self.lock:
+            if volume is not None:
+                self.volume = volume
+            if mute is not None:
+                self.mute = mute
+            connections = list(self.connections)
+
+        event = SimpleNamespace(facility="sink", index=0, t="change")
+        for connection in connections:
+            connection.push_event(event)
+
+
+SERVER = FakeServer()
+
+
+class Pulse:
+    def __init__(self, client_name: str | None = None):
+        self._condition = threading.Condition()
+        self._events = deque()
+        self._stop = False
+        self._waiting = False
+        self._callback = None
+        SERVER.connections.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self in SERVER.connections:
+            SERVER.connections.remove(self)
+
+    def event_mask_set(self, *masks): ...
+
+    def event_callback_set(self, callback):
+        self._callback = callback
+
+    def push_event(self, event):
+        with self._condition:
+            self._events.append(event)
+            self._condition.notify()
+
+    def event_listen_stop(self):
+        # like pa_mainloop_wakeup, only a loop that is already waiting wakes
+        with self._condition:
+            if self._waiting:
+                self._stop = True
+                self._condition.notify()
+
+    def event_listen(self, timeout: float | None = None):
+        with self._condition:
+            self._waiting = True
+            self._condition.wait_for(
+                lambda: self._events or self._stop, timeout=timeout
+            )
+            self._waiting = False
+            self._stop = False
+            events = list(self._events)
+            self._events.clear()
+
+        for event in events:
+            try:
+                self._callback(event)
+            except PulseLoopStop:
+                pass
+
+    def server_info(self):
+        return SimpleNamespace(default_sink_name="null", default_source_name=None)
+
+    def sink_list(self):
+        return [SERVER.get_sink()]
+
+    def source_list(self):
+        return []
+
+    def sink_input_list(self):
+        return []
+
+    def sink_info(self, index: int):
+        if index != 0:
+            raise PulseIndexError(index)
+        return SERVER.get_sink()
+
+    def sink_volume_set(self, index: int, volume: PulseVolumeInfo):
+        SERVER.update(volume=volume)
+
+    def sink_mute(self, index: int, mute: bool):
+        SERVER.update(mute=mute)
+
+
+def install_stub_pulsectl() -> types.ModuleType:
+    """Registers the stand-in as pulsectl, returning the module."""
+    pulsectl = types.ModuleType("pulsectl")
+    for value in (
+        Pulse,
+        PulseVolumeInfo,
+        PulseError,
+        PulseIndexError,
+        PulseOperationFailed,
+        PulseDisconnected,
+        PulseLoopStop,
+    ):
+        setattr(pulsectl, value.__name__, value)
+
+    pulsectl.PulseEventFacilityEnum = SimpleNamespace(
+        sink="sink", source="source", sink_input="sink_input", server="server"
+    )
+    pulsectl.PulseEventTypeEnum = SimpleNamespace(
+        new="new", change="change", remove="remove"
+    )
+    for name in ("PulseSinkInfo", "PulseSourceInfo", "PulseSinkInputInfo", "PulseEventInfo"):
+        setattr(pulsectl, name, SimpleNamespace)
+
+    sys.modules["pulsectl"] = pulsectl
+    return pulsectl
@@ -0,0 +1,231 @@
+"""
+Per-sample latency and allocation benchmarks for every system metric
+source, run against synthetic /proc and sysfs trees and a stub NVML.
+
+    python -m benchmarks.sys_info             compare against baselines
+    python -m benchmarks.sys_info --save      record new baselines
+
+A source fails when its p50 or peak allocation exceeds the baseline by
+both the tolerance ratio and an absolute floor, so microsecond-scale
+noise on fast sources cannot fail the run on its own.
+
+Network status is event driven through NetworkManager and has no
+sampling path, so it has no benchmark here.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.fixtures import FakeSystem, install_stub_nvml
+from util.proc_sampler import ProcSampler
+from util.disk_sampler import DiskSampler
+from util.gpu import NVMLBackend, SysfsGPUBackend
+
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+
+
+def build_sources(system: FakeSystem) -> dict[str, Callable[[], object]]:
+    proc_sampler = ProcSampler(proc_root=system.proc_root)
+    disk_sampler = DiskSampler(
+        [system.root], proc_root=system.proc_root, sysfs_root=system.sysfs_root
+    )
+
+    install_stub_nvml()
+    nvml = NVMLBackend()
+    sysfs_gpu = SysfsGPUBackend(system.gpu_device_path)
+
+    return {
+        "cpu": proc_sampler.read_cpu_percent,
+        "ram": proc_sampler.read_memory_percent,
+        "disk_capacity": disk_sampler.read_capacity,
+        "disk_throughput": disk_sampler.read_throughput,
+        "gpu_nvml": lambda: (nvml.read_usage(), nvml.read_memory()),
+        "gpu_sysfs": lambda: (sysfs_gpu.read_usage(), sysfs_gpu.read_memory()),
+    }
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def measure_latency(
+    system: FakeSystem, source: Callable[[], object], samples: int
+) -> dict[str, float]:
+    timings = []
+    for _ in range(samples):
+        system.advance()
+        start = time.perf_counter_ns()
+        source()
+        timings.append((time.perf_counter_ns() - start) / 1000)
+
+    return {
+        "mean_us": statistics.fmean(timings),
+        "p50_us": percentile(timings, 50),
+        "p95_us": percentile(timings, 95),
+        "p99_us": percentile(timings, 99),
+    }
+
+
+def measure_allocations(
+    system: FakeSystem, source: Callable[[], object], samples: int
+) -> dict[str, float]:
+    peaks = []
+    retained = []
+
+    tracemalloc.start()
+    for _ in range(samples):
+        system.advance()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        source()
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(current - before)
+    tracemalloc.stop()
+
+    return {
+        "peak_bytes": statistics.median(peaks),
+        "retained_bytes": statistics.median(retained),
+    }
+
+
+def run(samples: int, cores: int, repeats: int) -> dict[str, dict[str, float]]:
+    """
+    Latency is the median of each statistic over repeated runs, a single
+    run's p50 of a few microseconds moves with scheduler noise.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        system = FakeSystem(root, cores=cores)
+        for name, source in build_sources(system).items():
+            # warm up caches and first-read priming
+            for _ in range(10):
+                system.advance()
+                source()
+
+            runs = [measure_latency(system, source, samples) for _ in range(repeats)]
+            results[name] = {
+                key: statistics.median(run[key] for run in runs) for key in runs[0]
+            }
+            results[name].update(measure_allocations(system, source, samples // 10))
+
+    return results
+
+
+def is_regressed(value: float, baseline: float, tolerance: float, floor: float) -> bool:
+    """Slower than tolerance times the baseline and by more than the floor."""
+    return value > baseline * tolerance and value - baseline > floor
+
+
+def print_results(
+    results: dict,
+    baselines: dict | None,
+    tolerance: float,
+    floor_us: float,
+    floor_bytes: float,
+) -> bool:
+    """Prints a results table, returns False if any source regressed."""
+    passed = True
+    header = f"{'source':<16}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'peak B':>10}"
+    if baselines:
+        header += f"{'p50 vs base':>14}"
+    print(header)
+
+    for name, result in results.items():
+        row = (
+            f"{name:<16}{result['p50_us']:>10.2f}{result['p95_us']:>10.2f}"
+            f"{result['p99_us']:>10.2f}{result['peak_bytes']:>10.0f}"
+        )
+
+        baseline = baselines.get(name) if baselines else None
+        if baseline:
+            ratio = result["p50_us"] / baseline["p50_us"]
+            regressed = is_regressed(
+                result["p50_us"], baseline["p50_us"], tolerance, floor_us
+            ) or is_regressed(
+                result["peak_bytes"], baseline["peak_bytes"], tolerance, floor_bytes
+            )
+            passed &= not regressed
+            row += f"{ratio:>13.2f}x" + ("  REGRESSED" if regressed else "")
+
+        print(row)
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--cores", type=int, default=16)
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="runs per source, latency is the median across runs",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="allowed ratio against the baseline before failing",
+    )
+    parser.add_argument(
+        "--floor-us",
+        type=float,
+        default=10.0,
+        help="p50 increases smaller than this never fail",
+    )
+    parser.add_argument(
+        "--floor-bytes",
+        type=float,
+        default=256.0,
+        help="peak allocation increases smaller than this never fail",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="record results as the new baselines"
+    )
+    args = parser.parse_args()
+
+    results = run(args.samples, args.cores, args.repeats)
+
+    baselines = None
+    if BASELINES_PATH.exists() and not args.save:
+        baselines = json.loads(BASELINES_PATH.read_text())["results"]
+
+    passed = print_results(
+        results, baselines, args.tolerance, args.floor_us, args.floor_bytes
+    )
+
+    if args.save:
+        BASELINES_PATH.write_text(
+            json.dumps(
+                {
+                    "machine": platform.machine(),
+                    "processor_count": os.cpu_count(),
+                    "python": platform.python_version(),
+                    "samples": args.samples,
+                    "cores": args.cores,
+                    "repeats": args.repeats,
+                    "results": results,
+                },
+                indent=4,
+            )
+            + "\n"
+        )
+        print(f"Saved baselines to {BASELINES_PATH}")
+
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
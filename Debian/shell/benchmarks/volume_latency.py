@@ -0,0 +1,279 @@
+"""
+End-to-end latency from a volume change to the shell reacting to it.
+
+A writer issues N volume changes the way a keybind or another client
+would, through its own connection. The time until the audio service
+emits changed on the main loop (and with --osd, until the OSD has
+rebuilt its labels) is recorded for every change, along with the shell
+process' CPU time while busy and while idle. Writes that land before
+the service reports the previous one are counted as coalesced, and the
+run gives up with a nonzero exit if changes stop arriving.
+
+    python -m benchmarks.volume_latency --backend pulseaudio
+    python -m benchmarks.volume_latency --backend stub
+
+The pulseaudio backend starts a private daemon with a null sink in a
+temporary runtime directory, the stub backend replaces pulsectl with
+benchmarks.pulse_stub and needs no sound server at all.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def get_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def get_volumes(changes: int) -> list[float]:
+    # consecutive values always differ so no change is a no-op
+    return [0.2 + (index % 50) / 100 for index in range(changes)]
+
+
+@contextmanager
+def null_sink_server():
+    """Runs a throwaway pulseaudio daemon with a single null sink."""
+    if shutil.which("pulseaudio") is None:
+        raise SystemExit("pulseaudio is not installed, try --backend stub")
+
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        socket_path = os.path.join(runtime_dir, "native")
+        environment = dict(
+            os.environ,
+            PULSE_RUNTIME_PATH=runtime_dir,
+            PULSE_STATE_PATH=runtime_dir,
+            XDG_RUNTIME_DIR=runtime_dir,
+        )
+        daemon = subprocess.Popen(
+            [
+                "pulseaudio",
+                "--daemonize=no",
+                "--exit-idle-time=-1",
+                "--disable-shm",
+                "-n",
+                "-L",
+                "module-null-sink sink_name=null",
+                "-L",
+                f"module-native-protocol-unix socket={socket_path}",
+            ],
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                time.sleep(0.05)
+            else:
+                raise SystemExit("pulseaudio did not start")
+
+            os.environ["PULSE_SERVER"] = f"unix:{socket_path}"
+            yield
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+def write_volumes_process(volumes, interval, start_event, sent_times, sent_count):
+    """Runs in a child process so its cpu time is not billed to the shell."""
+    import pulsectl
+
+    with pulsectl.Pulse("volume-latency-writer") as pulse:
+        sink = pulse.get_sink_by_name("null")
+        channels = len(sink.volume.values)
+        start_event.wait()
+        for index, volume in enumerate(volumes):
+            sent_times[index] = time.monotonic()
+            sent_count.value = index + 1
+            pulse.sink_volume_set(sink.index, pulsectl.PulseVolumeInfo(volume, channels))
+            time.sleep(interval)
+
+
+def write_volumes_thread(volumes, interval, start_event, sent_times, sent_count):
+    import pulsectl
+
+    with pulsectl.Pulse("volume-latency-writer") as pulse:
+        start_event.wait()
+        for index, volume in enumerate(volumes):
+            sent_times[index] = time.monotonic()
+            sent_count.value = index + 1
+            pulse.sink_volume_set(0, pulsectl.PulseVolumeInfo(volume))
+            time.sleep(interval)
+
+
+def match_change(volume: float, volumes: list[float], first: int, sent: int) -> int:
+    """
+    Index of the newest sent change the observed volume belongs to, or -1.
+    Only changes not yet observed are searched, so values repeating every
+    50 changes can never match a change from an earlier cycle.
+    """
+    for index in range(sent - 1, first - 1, -1):
+        if round(volume, 2) == round(volumes[index], 2):
+            return index
+    return -1
+
+
+def run(
+    backend: str, changes: int, interval: float, idle: float, osd: bool, timeout: float
+) -> bool:
+    from gi.repository import GLib
+    from services.audio import AudioService
+
+    volumes = get_volumes(changes)
+    latencies: list[float] = []
+    next_change = [0]
+    # changes the service never reported on their own, because events
+    # are deduplicated per object and several writes landed between queries
+    coalesced = [0]
+
+    if backend == "pulseaudio":
+        # spawn rather than fork, the audio listener thread may already run
+        context = multiprocessing.get_context("spawn")
+        start_event = context.Event()
+        sent_times = context.Array("d", changes)
+        sent_count = context.Value("i", 0)
+        writer = context.Process(
+            target=write_volumes_process,
+            args=(volumes, interval, start_event, sent_times, sent_count),
+        )
+    else:
+        start_event = threading.Event()
+        sent_times = [0.0] * changes
+        sent_count = multiprocessing.Value("i", 0)
+        writer = threading.Thread(
+            target=write_volumes_thread,
+            args=(volumes, interval, start_event, sent_times, sent_count),
+            daemon=True,
+        )
+
+    audio_service = AudioService.get_instance()
+    if osd:
+        # connected first so our handler runs after the labels are rebuilt
+        from modules.osd import OSD
+
+        OSD()
+
+    loop = GLib.MainLoop()
+    cpu = {}
+
+    def on_changed(service):
+        first = next_change[0]
+        if not start_event.is_set() or first >= changes:
+            return
+
+        # stale events match nothing that is still outstanding
+        index = match_change(service.volume, volumes, first, sent_count.value)
+        if index < 0:
+            return
+
+        latencies.append((time.monotonic() - sent_times[index]) * 1000)
+        coalesced[0] += index - first
+        next_change[0] = index + 1
+        if next_change[0] == changes:
+            cpu["busy"] = get_cpu_time() - cpu["start"]
+            GLib.idle_add(measure_idle)
+
+    def on_timeout(*args):
+        cpu["timed_out"] = True
+        loop.quit()
+        return False
+
+    def start(*args):
+        cpu["start"] = get_cpu_time()
+        start_event.set()
+        return False
+
+    def measure_idle(*args):
+        cpu["idle_start"] = get_cpu_time()
+        GLib.timeout_add(int(idle * 1000), finish)
+        return False
+
+    def finish(*args):
+        cpu["idle"] = get_cpu_time() - cpu["idle_start"]
+        loop.quit()
+        return False
+
+    audio_service.connect("changed", on_changed)
+    writer.start()
+    # give the listener time to connect and load the initial state
+    GLib.timeout_add(500, start)
+    GLib.timeout_add(int(timeout * 1000), on_timeout)
+    loop.run()
+
+    if cpu.get("timed_out"):
+        print(
+            f"timed out after {timeout:.1f} s with {next_change[0]} of "
+            f"{changes} changes observed"
+        )
+        return False
+
+    print(f"backend      {backend}{' + osd' if osd else ''}")
+    print(f"changes      {changes}")
+    print(f"observed     {len(latencies)}")
+    print(f"coalesced    {coalesced[0]}")
+    print(f"p50          {percentile(latencies, 50):.3f} ms")
+    print(f"p95          {percentile(latencies, 95):.3f} ms")
+    print(f"p99          {percentile(latencies, 99):.3f} ms")
+    print(f"mean         {statistics.fmean(latencies):.3f} ms")
+    print(f"cpu/change   {cpu['busy'] / len(latencies) * 1000:.3f} ms")
+    print(f"idle cpu     {cpu['idle'] / idle * 100:.3f} % over {idle:.1f} s")
+    if backend == "stub":
+        print("note         stub writer runs in-process, cpu includes it")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=("pulseaudio", "stub"), default="stub")
+    parser.add_argument("--changes", type=int, default=500)
+    parser.add_argument(
+        "--interval", type=float, default=0.02, help="seconds between changes"
+    )
+    parser.add_argument(
+        "--idle", type=float, default=5.0, help="seconds of idle cpu measurement"
+    )
+    parser.add_argument(
+        "--osd", action="store_true", help="include the OSD label rebuild"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="seconds before giving up, defaults to the writing time plus 10 s",
+    )
+    args = parser.parse_args()
+
+    timeout = args.timeout
+    if timeout is None:
+        timeout = args.changes * args.interval + args.idle + 10
+    arguments = (args.backend, args.changes, args.interval, args.idle, args.osd, timeout)
+
+    if args.backend == "stub":
+        from benchmarks.pulse_stub import install_stub_pulsectl
+
+        install_stub_pulsectl()
+        passed = run(*arguments)
+    else:
+        with null_sink_server():
+            passed = run(*arguments)
+
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
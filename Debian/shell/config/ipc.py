@@ -0,0 +1,11 @@
+# socket created in $XDG_RUNTIME_DIR for scripts to query the shell
+SOCKET_NAME = "fabric-shell.sock"
+
+# subscribers that fall this far behind are disconnected
+MAX_SUBSCRIBER_BUFFER = 65536  # bytes
+
+# volume change per "volume up" / "volume down" command
+VOLUME_STEP = 0.05
+
+# volume changes are forwarded to wob when it is listening on this fifo
+WOB_SOCKET_NAME = "wob.sock"
@@ -1,4 +1,31 @@
 # HEADPHONE DEVICES
-# add more headphones by appending device description, shows different icon for
-# sinks in this list
+# headphones are detected from the sink's form factor and active port, add
+# sink names here for devices that do not report either
 HEADPHONES = ["alsa_output.usb-SteelSeries_Arctis_Nova_7X-00.analog-stereo"]
+
+# ALBUM ART
+# threads decoding covers, superseded decodes are cancelled
+ART_DECODE_WORKERS = 2
+
+# decoded covers kept in memory, keyed on art url and size
+ART_MEMORY_CACHE_SIZE = 32 * 1024 * 1024  # bytes
+
+# scaled covers saved under the storage directory, oldest pruned first
+ART_THUMBNAIL_DIRECTORY = "art_thumbnails"
+ART_THUMBNAIL_CACHE_SIZE = 64 * 1024 * 1024  # bytes
+
+# http and https covers, stored content addressed under the storage directory
+ART_REMOTE_DIRECTORY = "art_remote"
+ART_REMOTE_CACHE_SIZE = 128 * 1024 * 1024  # bytes
+ART_REMOTE_MAX_SIZE = 10 * 1024 * 1024  # bytes, larger covers are skipped
+ART_REMOTE_TIMEOUT = 10  # seconds
+ART_REMOTE_CONNECTIONS = 4
+
+# METADATA
+# metadata bursts within this window are shown as one update
+METADATA_COALESCE_INTERVAL = 16  # milliseconds
+
+# SEEKING
+# seeks from the keyboard or scrolling are sent at most once per window,
+# a drag only seeks when it is released
+SEEK_INTERVAL = 16  # milliseconds
@@ -0,0 +1,18 @@
+# number of bars drawn by the visualizer
+SPECTRUM_BANDS = 24
+
+SPECTRUM_SAMPLE_RATE = 44100  # hz
+
+# samples per FFT window, a new window is analysed every SPECTRUM_HOP_SIZE
+SPECTRUM_FFT_SIZE = 2048
+SPECTRUM_HOP_SIZE = 1024
+
+# frequency range split logarithmically across the bands
+SPECTRUM_MIN_FREQUENCY = 50  # hz
+SPECTRUM_MAX_FREQUENCY = 16000  # hz
+
+# levels below this are drawn as empty bars
+SPECTRUM_FLOOR_DB = -60.0
+
+# fraction of the previous level kept by a falling bar per window
+SPECTRUM_DECAY = 0.85
@@ -0,0 +1,23 @@
+SAMPLE_INTERVAL = 500  # milliseconds
+
+# sampling backs off towards this interval while readings are steady
+MAX_SAMPLE_INTERVAL = 5000  # milliseconds
+
+# changes smaller than this (in percentage points) are not published
+SAMPLE_DEADBAND = 1.0
+
+# number of samples kept per metric for history graphs
+HISTORY_LENGTH = 60
+
+# time covered by history graphs, the buffers hold at least this much
+# even at the fastest sample interval
+HISTORY_SPAN = HISTORY_LENGTH * SAMPLE_INTERVAL / 1000  # seconds
+
+# the first mount point is shown on the disk ring
+DISK_MOUNT_POINTS = ["/"]
+
+# block devices to report throughput for, None reports every whole disk
+DISK_DEVICES = None
+
+# disk fill changes slowly, mount changes trigger an immediate refresh
+DISK_CAPACITY_INTERVAL = 60  # seconds
@@ -6,6 +6,8 @@ from modules.bar import Bar
 from modules.control_panel import ControlPanel
 from modules.notifications import NotificationPopUp
 from modules.osd import OSD
+from services.ipc import IPCService
+from services.album_art import AlbumArtService
 
 from util.helpers import init_data_directory
 
@@ -27,6 +29,8 @@ def main():
     notification_pop_up = NotificationPopUp()
     osd = OSD()
 
+    IPCService.get_instance()
+
     app = Application(
         APP_NAME, bar, control_panel, notification_pop_up, osd, open_inspector=False
     )
@@ -41,6 +45,10 @@ def main():
 
     app.run()
 
+    # the art session stays open for the whole run, aiohttp warns if it
+    # is still open when the interpreter exits
+    AlbumArtService.get_instance().close()
+
 
 if __name__ == "__main__":
     main()
@@ -14,9 +14,6 @@ from modules.weather import WeatherInfo
 from util.ui import corner
 
 
-from gi.repository import Playerctl
-
-
 """
 Status bar for shell.
 """
@@ -34,9 +31,7 @@ class Bar(Window):
 
         self.control_panel = ControlPanel.get_instance()
 
-        self.player_manager = Playerctl.PlayerManager()
-        
-        self.media = MediaControl(self.player_manager)
+        self.media = MediaControl()
 
         self.power = PowerControl()
 
@@ -16,6 +16,7 @@ from modules.notifications import NotificationsOverview
 from services.reminders import ReminderService
 from modules.reminders import CreateReminderView
 from modules.todo import ToDoList
+from modules.mixer import Mixer
 from util.ui import corner
 
 from gi.repository import GdkPixbuf
@@ -47,6 +48,8 @@ class ControlPanel(Window, Singleton):
 
         self.to_do_list = ToDoList(on_switch=self.show_notifications_overview)
 
+        self.mixer = Mixer()
+
         self.profile_image = Box(
             name="profile-image-box",
             h_align="center",
@@ -109,6 +112,7 @@ class ControlPanel(Window, Singleton):
             h_align="start",
             children=[
                 self.network_overview,
+                self.mixer,
             ],
         )
 
@@ -2,22 +2,21 @@ from fabric.widgets.box import Box
 from fabric.widgets.eventbox import EventBox
 from fabric.widgets.label import Label
 from fabric.widgets.button import Button
-from fabric.audio.service import Audio
 from fabric.widgets.wayland import WaylandWindow as Window
 from fabric.widgets.scale import Scale
 from fabric.utils import truncate, bulk_connect
 
-from gi.repository import Playerctl, GdkPixbuf
+from gi.repository import GdkPixbuf, Gio, GLib
 
-import pulsectl
-from loguru import logger
-
-from services.volume import VolumeService
+from services.audio import AudioService
+from services.media import MediaService, METADATA_FIELDS
+from services.album_art import AlbumArtService
+from services.spectrum import SpectrumService
 from widgets.custom_image import CustomImage
+from widgets.spectrum import Spectrum
 from util.ui import add_hover_cursor, toggle_visible
-from util.helpers import get_file_path_from_mpris_url
-from config.media import HEADPHONES
 import config.icons as Icons
+from config.media import SEEK_INTERVAL
 
 
 """ Side Media control and info module. """
@@ -28,7 +27,7 @@ import config.icons as Icons
 
 
 class MediaControl(Box):
-    def __init__(self, player_manager, **kwargs):
+    def __init__(self, **kwargs):
         super().__init__(
             name="media-control",
             spacing=10,
@@ -37,10 +36,11 @@ class MediaControl(Box):
             **kwargs,
         )
 
-        self.manager = player_manager
-        self.audio = Audio()
-        self.pulse = pulsectl.Pulse()
-        self.volume_service = VolumeService.get_instance()
+        self.media_service = MediaService.get_instance()
+        self.audio_service = AudioService.get_instance()
+        self.spectrum_service = SpectrumService.get_instance()
+        self.album_art_service = AlbumArtService.get_instance()
+        self.art_cancellable: Gio.Cancellable | None = None
         self.media_panel = MediaPanel()
 
         self.title = Label(
@@ -68,6 +68,22 @@ class MediaControl(Box):
             },
         )
 
+        self.spectrum = Spectrum(
+            self.spectrum_service.bands,
+            name="media-spectrum",
+            v_align="center",
+            size=(72, 24),
+        )
+        self.spectrum_service.connect("updated", self.spectrum.refresh)
+        # capture only runs while the bars can be seen moving
+        bulk_connect(
+            self.spectrum,
+            {
+                "map": self.update_spectrum_capture,
+                "unmap": self.update_spectrum_capture,
+            },
+        )
+
         self.output_control = Button(
             child=Label(style_classes="media-control-icon", markup=Icons.speaker),
             on_clicked=self.swap_audio_sink,
@@ -99,13 +115,14 @@ class MediaControl(Box):
             name="volume-scale",
             increments=(0.01, 0.1),
             h_align="center",
-            value=self.volume_service.volume,
+            value=self.audio_service.volume,
         )
         self.volume_scale.connect("change-value", self.on_volume_slider_value_change)
         add_hover_cursor(self.volume_scale)
 
         self.children = [
             self.media_info,
+            self.spectrum,
             self.output_control,
             self.prev_track_control,
             self.play_control,
@@ -113,136 +130,129 @@ class MediaControl(Box):
             self.volume_scale,
         ]
 
-        for name in player_manager.props.player_names:
-            self.init_player(name)
+        self.media_service.connect("notify::is-playing", self.on_playback_changed)
+        self.media_service.connect("metadata-changed", self.on_metadata_changed)
+        self.on_playback_changed(self.media_service)
+        self.on_metadata_changed(self.media_service, set(METADATA_FIELDS))
 
-        player_manager.connect("name-appeared", self.on_name_appeared)
-
-        self.audio.connect("speaker_changed", self.on_speaker_changed)
+        self.audio_service.connect(
+            "notify::headphones-active", self.on_speaker_changed
+        )
 
-        self.volume_service.connect("changed", self.set_volume_scale_value)
+        self.audio_service.connect("changed", self.set_volume_scale_value)
 
     def set_volume_scale_value(self, *args):
-        volume = self.volume_service.volume if not self.volume_service.is_muted else 0
+        volume = self.audio_service.volume if not self.audio_service.is_muted else 0
         self.volume_scale.value = volume
 
     def toggle_play_pause(self, *args):
-        players = self.manager.props.players
-        if players:
-            players[0].play_pause()
+        self.media_service.play_pause()
 
     def skip_to_prev_track(self, *args):
-        players = self.manager.props.players
-        if players:
-            players[0].previous()
+        self.media_service.previous()
 
     def skip_to_next_track(self, *args):
-        players = self.manager.props.players
-        if players:
-            players[0].next()
+        self.media_service.next()
 
-    def init_player(self, name):
-        player = Playerctl.Player.new_from_name(name)
-        player.connect("playback-status::playing", self.on_play, self.manager)
-        player.connect("playback-status::paused", self.on_pause, self.manager)
-        player.connect("playback-status::stopped", self.on_pause, self.manager)
-        player.connect("metadata", self.on_metadata, self.manager)
-        self.manager.manage_player(player)
-
-    def on_play(self, player, status, manager):
-        label = Label(style_classes="media-control-icon", markup=Icons.pause)
+    def on_playback_changed(self, service, *args):
+        icon = Icons.pause if service.is_playing else Icons.play
+        label = Label(style_classes="media-control-icon", markup=icon)
 
         self.play_control.children = label
 
-    def on_pause(self, player, status, manager):
-        label = Label(style_classes="media-control-icon", markup=Icons.play)
+        self.update_spectrum_capture()
 
-        self.play_control.children = label
+    def update_spectrum_capture(self, *args):
+        self.spectrum_service.set_active(
+            self.media_service.is_playing and self.spectrum.get_mapped()
+        )
 
-    def on_metadata(self, player, metadata, manager):
+    def on_metadata_changed(self, service, changed: set[str]):
         """
         Update media info on bar and on media panel
         """
-        self.update_title(metadata)
-
-        self.update_artist(metadata)
-
-        self.update_media_info_visibility(metadata)
-
-        self.update_album(metadata)
+        if "title" in changed:
+            self.update_title(service.title)
+
+        # the bar label length depends on whether the title is shown
+        if changed & {"title", "artist"}:
+            self.update_artist(service.artist)
+            self.media_info.set_property(
+                "visible", bool(service.title or service.artist)
+            )
 
-        self.update_art(metadata)
+        if "album" in changed:
+            self.update_album(service.album)
 
-    def update_title(self, metadata: dict):
-        if "xesam:title" in metadata.keys() and metadata["xesam:title"] != "":
-            self.media_info.set_property("visible", True)
+        # players such as mpv rewrite one cover file for every track, so a
+        # track change reloads the art even when the url stays the same
+        if changed & {"title", "album", "art_url"}:
+            self.update_art(service.art_url)
 
-            title_str = metadata["xesam:title"]
-            self.title.set_property("label", truncate(title_str, 24))
+    def update_title(self, title: str):
+        if title != "":
+            self.title.set_property("label", truncate(title, 24))
             self.title.set_property("visible", True)
 
-            self.media_panel.title.set_property("label", title_str)
+            self.media_panel.title.set_property("label", title)
             self.media_panel.title.set_property("visible", True)
-
-            self.media_info.set_property("visible", True)
         else:
             self.title.set_property("visible", False)
             self.media_panel.title.set_property("visible", False)
 
-    def update_artist(self, metadata: dict):
-        if "xesam:artist" in metadata.keys() and metadata["xesam:artist"] != [""]:
-            self.media_info.set_property("visible", True)
-
-            artist_str = metadata["xesam:artist"][0]
+    def update_artist(self, artist: str):
+        if artist != "":
             # add space and comma between title and artist when title is visible
             if self.title.get_property("visible"):
-                self.artist.set_property("label", truncate(artist_str, 24))
+                self.artist.set_property("label", truncate(artist, 24))
             else:
-                self.artist.set_property("label", artist_str)
+                self.artist.set_property("label", artist)
             self.artist.set_property("visible", True)
 
-            self.media_panel.artist.set_property("label", artist_str)
+            self.media_panel.artist.set_property("label", artist)
             self.media_panel.artist.set_property("visible", True)
-
-            self.media_info.set_property("visible", True)
         else:
             self.artist.set_property("visible", False)
             self.media_panel.artist.set_property("visible", False)
 
-    def update_media_info_visibility(self, metadata: dict):
-        if (
-            "xesam:title" in metadata.keys()
-            and metadata["xesam:title"] == ""
-            and "xesam:artist" in metadata.keys()
-            and metadata["xesam:artist"] == [""]
-        ):
-            self.media_info.set_property("visible", False)
-
-    def update_album(self, metadata: dict):
-        if "xesam:album" in metadata.keys() and metadata["xesam:album"] != "":
-            self.media_panel.album.set_property("label", metadata["xesam:album"])
+    def update_album(self, album: str):
+        if album != "":
+            self.media_panel.album.set_property("label", album)
             self.media_panel.album.set_property("visible", True)
         else:
             self.media_panel.album.set_property("visible", False)
 
-    def update_art(self, metadata: dict):
-        if "mpris:artUrl" in metadata.keys():
-            file_path = get_file_path_from_mpris_url(metadata["mpris:artUrl"])
-            self_width = self.get_preferred_width().natural_width
-            art_pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-                file_path, self_width - 60, self_width - 60, True
+    def update_art(self, art_url: str):
+        # only the newest track's cover is worth decoding
+        if self.art_cancellable is not None:
+            self.art_cancellable.cancel()
+            self.art_cancellable = None
+
+        if art_url != "":
+            art_size = self.get_preferred_width().natural_width - 60
+            # the cover follows the text and controls, not the visualizer
+            if self.spectrum.get_visible():
+                art_size -= (
+                    self.spectrum.get_preferred_width().natural_width
+                    + self.get_spacing()
+                )
+            self.art_cancellable = self.album_art_service.load(
+                art_url, art_size, art_size, self.on_art_loaded
             )
+        else:
+            self.media_panel.art.set_property("visible", False)
+
+    def on_art_loaded(self, art_pixbuf: GdkPixbuf.Pixbuf | None):
+        self.art_cancellable = None
+
+        if art_pixbuf is not None:
             self.media_panel.art.set_property("pixbuf", art_pixbuf)
             self.media_panel.art.set_property("visible", True)
         else:
             self.media_panel.art.set_property("visible", False)
 
-    def on_name_appeared(self, manager, name):
-        """Automatically add new players to manager."""
-        self.init_player(name)
-
-    def on_speaker_changed(self, service):
-        if service.speaker.name in HEADPHONES:
+    def on_speaker_changed(self, service, *args):
+        if service.headphones_active:
             icon = Icons.headphones
         else:
             icon = Icons.speaker
@@ -256,44 +266,173 @@ class MediaControl(Box):
         Changes audio output by rotating through the sinks
         detected by pulse audio.
         """
-        sink_names = [sink.name for sink in self.pulse.sink_list()]
-        default_sink = self.pulse.sink_default_get()
-        default_sink_idx = sink_names.index(default_sink.name)
+        self.audio_service.rotate_default_sink()
 
-        new_sink_idx = (default_sink_idx + 1) % len(sink_names)
-        new_sink_name = sink_names[new_sink_idx]
+    def on_volume_slider_value_change(self, widget, event, value):
+        self.audio_service.set_volume(value)
 
-        try:
-            new_sink = self.pulse.get_sink_by_name(new_sink_name)
-            self.pulse.sink_default_set(new_sink)
-        except pulsectl.pulsectl.PulseIndexError:
-            logger.error(f"Could not set default sink: {new_sink_name}")
+    def show_media_info_panel(self, *args):
+        toggle_visible(self.media_panel)
 
-    def on_volume_slider_value_change(self, widget, event, value):
-        if value < 0:
-            value = 0
-        elif value > 1:
-            value = 1
+    def hide_media_info_panel(self, *args):
+        toggle_visible(self.media_panel)
 
-        sink = self.pulse.sink_default_get()
 
-        # unmute sink on slide
-        if sink.mute and value > 0:
-            self.pulse.sink_mute(sink.index, False)
+def format_time(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
 
-        sink_volume = sink.volume
-        sink_volume.value_flat = value
-        self.pulse.sink_volume_set(sink.index, sink_volume)
 
-    def get_pulse_volume(self, *args):
-        sink = self.pulse.sink_default_get()
-        return 0 if sink.mute else sink.volume.value_flat
+class MediaSeekBar(Box):
+    """
+    Playback position of the active player. The position is interpolated
+    by the media service, so the bar follows it with a tick callback that
+    only runs while the bar is on screen and the player is playing.
 
-    def show_media_info_panel(self, *args):
-        toggle_visible(self.media_panel)
+    Seeking is a blocking D-Bus call, so the bar moves locally while it is
+    dragged and the player is only asked to seek once it is released.
+    """
 
-    def hide_media_info_panel(self, *args):
-        toggle_visible(self.media_panel)
+    def __init__(self, **kwargs):
+        super().__init__(
+            name="media-seek-bar",
+            orientation="v",
+            visible=False,
+            **kwargs,
+        )
+
+        self.media_service = MediaService.get_instance()
+        self.tick_handler: int | None = None
+        self.shown_second = -1
+
+        # fraction of the track waiting to be sent to the player
+        self.seek_value: float | None = None
+        self.seek_timer: int | None = None
+        self.dragging = False
+
+        self.scale = Scale(
+            name="media-seek-scale",
+            min_value=0,
+            max_value=1,
+            increments=(0.01, 0.1),
+            h_expand=True,
+        )
+        bulk_connect(
+            self.scale,
+            {
+                "change-value": self.on_seek,
+                "button-press-event": self.on_seek_press,
+                "button-release-event": self.on_seek_release,
+            },
+        )
+        add_hover_cursor(self.scale)
+
+        self.position_label = Label(style_classes="media-seek-time", h_align="start")
+        self.length_label = Label(style_classes="media-seek-time", h_align="end")
+
+        self.children = [
+            self.scale,
+            Box(children=[self.position_label, Box(h_expand=True), self.length_label]),
+        ]
+
+        bulk_connect(
+            self.media_service,
+            {
+                "position-changed": self.on_position_changed,
+                "notify::length": self.on_length_changed,
+                "notify::is-playing": self.update_ticking,
+                "notify::can-seek": self.on_can_seek_changed,
+            },
+        )
+        bulk_connect(
+            self,
+            {
+                "map": self.update_ticking,
+                "unmap": self.update_ticking,
+            },
+        )
+
+        self.on_length_changed(self.media_service)
+        self.on_can_seek_changed(self.media_service)
+
+    def update_ticking(self, *args):
+        should_tick = self.media_service.is_playing and self.get_mapped()
+        if should_tick and self.tick_handler is None:
+            self.tick_handler = self.add_tick_callback(self.on_tick)
+        elif not should_tick and self.tick_handler is not None:
+            self.remove_tick_callback(self.tick_handler)
+            self.tick_handler = None
+            # show where playback stopped
+            self.update_position()
+
+    def on_tick(self, widget, frame_clock) -> bool:
+        self.update_position()
+        return True
+
+    def update_position(self):
+        length = self.media_service.length
+        # the bar shows the seek target until the player has it
+        if length <= 0 or self.seek_value is not None:
+            return
+
+        position = self.media_service.get_position()
+        self.scale.set_value(position / length)
+        self.update_position_label(position)
+
+    def update_position_label(self, position: float):
+        # the label only changes once a second
+        second = int(position)
+        if second != self.shown_second:
+            self.shown_second = second
+            self.position_label.set_label(format_time(position))
+
+    def on_position_changed(self, service):
+        self.update_position()
+
+    def on_length_changed(self, service, *args):
+        self.set_visible(service.length > 0)
+        self.length_label.set_label(format_time(service.length))
+        self.update_position()
+
+    def on_can_seek_changed(self, service, *args):
+        self.scale.set_sensitive(service.can_seek)
+
+    def on_seek(self, scale, scroll_type, value):
+        self.seek_value = min(max(value, 0.0), 1.0)
+        self.update_position_label(self.seek_value * self.media_service.length)
+        if not self.dragging:
+            self.schedule_seek()
+
+    def on_seek_press(self, *args):
+        self.dragging = True
+        return False
+
+    def on_seek_release(self, *args):
+        self.dragging = False
+        # scheduled rather than sent here, the scale may still report the
+        # release position after this handler
+        if self.seek_value is not None:
+            self.schedule_seek()
+        return False
+
+    def schedule_seek(self):
+        # the latest value within the window wins
+        if self.seek_timer is None:
+            self.seek_timer = GLib.timeout_add(SEEK_INTERVAL, self.flush_seek)
+
+    def flush_seek(self) -> bool:
+        self.seek_timer = None
+        if self.dragging or self.seek_value is None:
+            return False
+
+        value = self.seek_value
+        self.seek_value = None
+        # takes a new reference point right away, redrawing the bar
+        self.media_service.set_position(value * self.media_service.length)
+        return False
 
 
 class MediaPanel(Window):
@@ -322,6 +461,8 @@ class MediaPanel(Window):
             style_classes="media-info-panel-text", visible=False, line_wrap="word"
         )
 
+        self.seek_bar = MediaSeekBar()
+
         self.box = Box(
             name="media-info-panel-box",
             orientation="v",
@@ -337,6 +478,7 @@ class MediaPanel(Window):
                 self.title,
                 self.artist,
                 self.album,
+                self.seek_bar,
             ],
         )
 
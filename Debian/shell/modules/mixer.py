@@ -0,0 +1,183 @@
+from fabric.widgets.box import Box
+from fabric.widgets.label import Label
+from fabric.widgets.button import Button
+from fabric.widgets.scale import Scale
+from fabric.utils.helpers import truncate
+
+from services.audio import AudioService
+from util.ui import add_hover_cursor
+import config.icons as Icons
+
+
+""" Per-application stream and input source mixer. """
+
+
+def get_stream_name(stream) -> str:
+    return stream.proplist.get("application.name", stream.name)
+
+
+def get_source_name(source) -> str:
+    return source.description or source.name
+
+
+def is_monitor_source(source) -> bool:
+    return source.proplist.get("device.class") == "monitor"
+
+
+class MixerRow(Box):
+    def __init__(self, index, on_volume, on_mute, **kwargs):
+        super().__init__(
+            style_classes="mixer-row",
+            spacing=10,
+            orientation="h",
+            **kwargs,
+        )
+
+        self.index = index
+
+        self.mute_icon = Label(style_classes="mixer-icon", markup=Icons.volume_high)
+        self.mute_button = Button(
+            style_classes="mixer-mute-button",
+            child=self.mute_icon,
+            on_clicked=lambda *_: on_mute(self.index, not self.is_muted),
+        )
+        add_hover_cursor(self.mute_button)
+
+        self.name = Label(style_classes="mixer-label", h_align="start")
+
+        self.volume_scale = Scale(
+            style_classes="mixer-scale",
+            increments=(0.01, 0.1),
+            h_expand=True,
+        )
+        self.volume_scale.connect(
+            "change-value", lambda _, __, value: on_volume(self.index, value)
+        )
+        add_hover_cursor(self.volume_scale)
+
+        self.is_muted = False
+
+        self.children = [
+            self.mute_button,
+            Box(
+                orientation="v",
+                h_expand=True,
+                children=[self.name, self.volume_scale],
+            ),
+        ]
+
+    def update(self, name: str, volume: float, is_muted: bool, is_volume_pending: bool):
+        self.name.set_property("label", truncate(name, 24))
+        # the server still reports an older volume while a drag is being
+        # written, showing it would make the slider jump back
+        if not is_volume_pending:
+            self.volume_scale.value = volume
+
+        if is_muted != self.is_muted:
+            self.is_muted = is_muted
+            self.mute_icon.set_property(
+                "markup", Icons.volume_muted if is_muted else Icons.volume_high
+            )
+
+
+class Mixer(Box):
+    """
+    Volume and mute controls for every application stream and input
+    source. Rows are added, updated and removed from the audio service's
+    per object signals, opening the panel never queries the server.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            name="mixer",
+            orientation="v",
+            spacing=10,
+            h_expand=True,
+            **kwargs,
+        )
+
+        self.audio_service = AudioService.get_instance()
+
+        self.stream_rows: dict[int, MixerRow] = {}
+        self.source_rows: dict[int, MixerRow] = {}
+
+        self.streams_list = Box(orientation="v", spacing=5)
+        self.sources_list = Box(orientation="v", spacing=5)
+
+        self.no_streams_label = Label(
+            style_classes="mixer-label", label="Nothing playing"
+        )
+
+        self.children = [
+            Label(style_classes="mixer-header", h_align="start", label="Applications"),
+            self.no_streams_label,
+            self.streams_list,
+            Label(style_classes="mixer-header", h_align="start", label="Inputs"),
+            self.sources_list,
+        ]
+
+        self.audio_service.connect("stream-added", self.on_stream_changed)
+        self.audio_service.connect("stream-changed", self.on_stream_changed)
+        self.audio_service.connect("stream-removed", self.on_stream_removed)
+        self.audio_service.connect("source-added", self.on_source_changed)
+        self.audio_service.connect("source-changed", self.on_source_changed)
+        self.audio_service.connect("source-removed", self.on_source_removed)
+
+        # pick up anything already cached
+        for stream in self.audio_service.streams:
+            self.on_stream_changed(self.audio_service, stream.index)
+        for source in self.audio_service.sources:
+            self.on_source_changed(self.audio_service, source.index)
+
+    def on_stream_changed(self, service, index):
+        stream = service.get_stream(index)
+        if stream is None:
+            return
+
+        row = self.stream_rows.get(index)
+        if row is None:
+            row = self.stream_rows[index] = MixerRow(
+                index, service.set_stream_volume, service.set_stream_muted
+            )
+            self.streams_list.add(row)
+            self.no_streams_label.set_visible(False)
+
+        row.update(
+            get_stream_name(stream),
+            stream.volume.value_flat,
+            bool(stream.mute),
+            service.is_stream_volume_pending(index),
+        )
+
+    def on_stream_removed(self, service, index):
+        row = self.stream_rows.pop(index, None)
+        if row is not None:
+            self.streams_list.remove(row)
+            row.destroy()
+
+        self.no_streams_label.set_visible(not self.stream_rows)
+
+    def on_source_changed(self, service, index):
+        source = service.get_source(index)
+        if source is None or is_monitor_source(source):
+            return
+
+        row = self.source_rows.get(index)
+        if row is None:
+            row = self.source_rows[index] = MixerRow(
+                index, service.set_source_volume, service.set_source_muted
+            )
+            self.sources_list.add(row)
+
+        row.update(
+            get_source_name(source),
+            source.volume.value_flat,
+            bool(source.mute),
+            service.is_source_volume_pending(index),
+        )
+
+    def on_source_removed(self, service, index):
+        row = self.source_rows.pop(index, None)
+        if row is not None:
+            self.sources_list.remove(row)
+            row.destroy()
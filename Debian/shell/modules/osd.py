@@ -3,7 +3,7 @@ from fabric.widgets.stack import Stack
 from fabric.widgets.box import Box
 from fabric.widgets.label import Label
 
-from services.volume import VolumeService
+from services.audio import AudioService
 import config.icons as Icons
 from config.osd import TIMEOUT_DELAY
 
@@ -44,18 +44,18 @@ class OSD(Window):
 
         self.timeout_id = None
 
-        self.volume_service = VolumeService.get_instance()
+        self.audio_service = AudioService.get_instance()
 
         self.volume_icon = Label(
             name="osd-volume-icon",
             markup=get_volume_icon(
-                self.volume_service.volume, self.volume_service.is_muted
+                self.audio_service.volume, self.audio_service.is_muted
             ),
         )
         self.volume_percent = Label(
             name="osd-volume-percent",
             label=get_volume_percent_label(
-                self.volume_service.volume, self.volume_service.is_muted
+                self.audio_service.volume, self.audio_service.is_muted
             ),
         )
         self.volume_element = Box(
@@ -75,7 +75,7 @@ class OSD(Window):
 
         self.add(self.content_stack)
 
-        self.volume_service.connect("changed", self.on_volume_changed)
+        self.audio_service.connect("changed", self.on_volume_changed)
 
         self.hide()
 
@@ -92,8 +92,8 @@ class OSD(Window):
             GLib.source_remove(self.timeout_id)
             self.timeout_id = None
 
-        volume = self.volume_service.volume
-        is_muted = self.volume_service.is_muted
+        volume = self.audio_service.volume
+        is_muted = self.audio_service.is_muted
 
         self.volume_icon = Label(
             name="osd-volume-icon", markup=get_volume_icon(volume, is_muted)
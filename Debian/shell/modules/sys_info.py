@@ -1,23 +1,29 @@
 from fabric.widgets.label import Label
 from fabric.widgets.box import Box
+from fabric.widgets.eventbox import EventBox
+from fabric.widgets.revealer import Revealer
 from fabric.widgets.circularprogressbar import CircularProgressBar
-from fabric import Fabricator
+from fabric.utils.helpers import bulk_connect
 
 from services.network import NetworkService
+from services.system_metrics import SystemMetricsService
+from config.system_metrics import HISTORY_SPAN
 import config.icons as Icons
 from widgets.animated_circular_progress_bar import AnimatedCircularProgressBar
+from widgets.sparkline import Sparkline
+from widgets.core_heatmap import CoreHeatmap
 
-import psutil
-from pynvml_utils import nvidia_smi
 
-nvsmi = nvidia_smi.getInstance()
-
-
-# TODO: Move fabricators into services so they can be shared efficiently
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
 
 
 class SysInfoCircularBar(AnimatedCircularProgressBar):
-    def __init__(self, icon, poll_func, **kwargs):
+    def __init__(self, icon, metric, **kwargs):
         super().__init__(
             h_align="center",
             v_align="center",
@@ -31,28 +37,94 @@ class SysInfoCircularBar(AnimatedCircularProgressBar):
 
         self.children = Label(markup=icon, style_classes="sys-info-icon")
 
-        self.value_fabricator = Fabricator(
-            interval=500, poll_from=poll_func, on_changed=self.on_value_changed
-        )
+        self.metric = metric
+        self.metrics_service = SystemMetricsService.get_instance()
 
-    def on_value_changed(self, _, value):
+        self.metrics_service.connect(f"notify::{metric}", self.on_value_changed)
+        # run once to pick up the latest sample
+        self.on_value_changed()
+
+    def on_value_changed(self, *args):
+        value = self.metrics_service.get_property(self.metric)
         self.animate_value(value / 100.0)
 
 
-class CPUUsage(Box):
-    def __init__(self, **kwargs):
+class SysInfoHistory(Box):
+    """Circular bar that slides out a history graph of its metric on hover."""
+
+    def __init__(self, icon, metric, **kwargs):
         super().__init__(
             h_align="center",
             v_align="center",
             style_classes="sys-info-box",
-            children=SysInfoCircularBar(
-                style_classes="sys-info-circular-bar",
-                icon=Icons.cpu,
-                poll_func=lambda *_: psutil.cpu_percent(),
-            ),
             **kwargs,
         )
 
+        self.metrics_service = SystemMetricsService.get_instance()
+
+        self.sparkline = Sparkline(
+            self.metrics_service.get_history(metric),
+            HISTORY_SPAN,
+            style_classes="sys-info-sparkline",
+            size=(100, 40),
+        )
+        self.history_box = Box(
+            orientation="v",
+            v_align="center",
+            spacing=5,
+            children=self.sparkline,
+        )
+        self.history_revealer = Revealer(
+            transition_type="slide-left",
+            transition_duration=250,
+            child=self.history_box,
+        )
+
+        self.event_box = EventBox(
+            events=["enter-notify", "leave-notify"],
+            child=Box(
+                children=[
+                    self.history_revealer,
+                    SysInfoCircularBar(
+                        style_classes="sys-info-circular-bar",
+                        icon=icon,
+                        metric=metric,
+                    ),
+                ]
+            ),
+        )
+
+        bulk_connect(
+            self.event_box,
+            {
+                "enter-notify-event": lambda *_: self.set_history_visible(True),
+                "leave-notify-event": lambda *_: self.set_history_visible(False),
+            },
+        )
+
+        self.children = self.event_box
+
+        self.metrics_service.connect("sampled", lambda *_: self.sparkline.refresh())
+
+    def set_history_visible(self, visible: bool) -> None:
+        self.history_revealer.set_reveal_child(visible)
+
+
+class CPUUsage(SysInfoHistory):
+    def __init__(self, **kwargs):
+        super().__init__(icon=Icons.cpu, metric="cpu", **kwargs)
+
+        self.core_heatmap = CoreHeatmap(
+            self.metrics_service.get_core_usage,
+            style_classes="sys-info-core-heatmap",
+            size=(100, 10),
+        )
+        self.history_box.add(self.core_heatmap)
+
+        self.metrics_service.connect(
+            "sampled", lambda *_: self.core_heatmap.refresh()
+        )
+
 
 class GPUUsage(Box):
     def __init__(self, **kwargs):
@@ -63,28 +135,26 @@ class GPUUsage(Box):
             children=SysInfoCircularBar(
                 style_classes="sys-info-circular-bar",
                 icon=Icons.gpu,
-                poll_func=self._get_usage,
+                metric="gpu",
             ),
             **kwargs
         )
 
-    def _get_usage(self, *_):
-        return nvsmi.DeviceQuery("utilization.gpu")["gpu"][0]["utilization"]["gpu_util"]
+        self.metrics_service = SystemMetricsService.get_instance()
+
+        self.metrics_service.connect(
+            "notify::gpu-available", self.on_notify_gpu_available
+        )
+        # hidden until a supported gpu is found
+        self.on_notify_gpu_available()
+
+    def on_notify_gpu_available(self, *args) -> None:
+        self.set_visible(self.metrics_service.gpu_available)
 
 
-class RAM(Box):
+class RAM(SysInfoHistory):
     def __init__(self, **kwargs):
-        super().__init__(
-            h_align="center",
-            v_align="center",
-            style_classes="sys-info-box",
-            children=SysInfoCircularBar(
-                style_classes="sys-info-circular-bar",
-                icon=Icons.ram,
-                poll_func=lambda *_: psutil.virtual_memory().percent,
-            ),
-            **kwargs,
-        )
+        super().__init__(icon=Icons.ram, metric="ram", **kwargs)
 
 
 class Disk(Box):
@@ -96,11 +166,30 @@ class Disk(Box):
             children=SysInfoCircularBar(
                 style_classes="sys-info-circular-bar",
                 icon=Icons.disk,
-                poll_func=lambda *_: psutil.disk_usage("/").percent,
+                metric="disk",
             ),
             **kwargs,
         )
 
+        self.metrics_service = SystemMetricsService.get_instance()
+
+        # built on demand so idle disk activity costs nothing
+        self.set_has_tooltip(True)
+        self.connect("query-tooltip", self.on_query_tooltip)
+
+    def on_query_tooltip(self, widget, x, y, keyboard_mode, tooltip) -> bool:
+        lines = [
+            f"{mount_point}  {percent:.0f}%"
+            for mount_point, percent in self.metrics_service.disk_usage.items()
+        ]
+        lines += [
+            f"{device}  R {format_bytes(read)}/s  W {format_bytes(written)}/s"
+            for device, (read, written) in self.metrics_service.disk_throughput.items()
+        ]
+
+        tooltip.set_text("\n".join(lines))
+        return len(lines) > 0
+
 
 class NetworkInfo(Box):
     def __init__(self, **kwargs):
@@ -0,0 +1,237 @@
+import os
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from fabric.core.service import Service
+from gi.repository import GLib, Gio, GdkPixbuf
+from loguru import logger
+
+from util.singleton import Singleton
+from util.helpers import get_file_path_from_mpris_url
+from util.art_fetcher import ArtFetcher, is_remote_url
+from util.disk_cache import write_atomic, prune_directory
+from config.storage import STORAGE_DIRECTORY
+from config.media import (
+    ART_DECODE_WORKERS,
+    ART_MEMORY_CACHE_SIZE,
+    ART_THUMBNAIL_DIRECTORY,
+    ART_THUMBNAIL_CACHE_SIZE,
+    ART_REMOTE_DIRECTORY,
+    ART_REMOTE_CACHE_SIZE,
+    ART_REMOTE_MAX_SIZE,
+    ART_REMOTE_TIMEOUT,
+    ART_REMOTE_CONNECTIONS,
+)
+
+# art url, width and height
+ArtKey = tuple[str, int, int]
+
+
+def decode_art(
+    path: str, width: int, height: int, cancellable: Gio.Cancellable
+) -> GdkPixbuf.Pixbuf:
+    """Decodes and scales an image, giving up as soon as it is cancelled."""
+    stream = Gio.File.new_for_path(path).read(cancellable)
+    try:
+        return GdkPixbuf.Pixbuf.new_from_stream_at_scale(
+            stream, width, height, True, cancellable
+        )
+    finally:
+        stream.close(None)
+
+
+def get_source_stamp(art_url: str) -> tuple[int, int] | None:
+    """
+    Modification time and size of a local cover. Players often rewrite
+    the same file for every track, so the url alone does not identify it.
+    """
+    try:
+        stat = os.stat(get_file_path_from_mpris_url(art_url))
+    except (OSError, ValueError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class AlbumArtService(Service, Singleton):
+    """
+    Decodes album art on worker threads and hands the pixbuf back on the
+    main loop. Each load returns a cancellable, cancelling it drops a
+    queued decode, aborts one in progress and suppresses the callback.
+
+    Decoded covers are kept in an LRU bounded by bytes, with scaled
+    thumbnails on disk behind it so a cold start skips the full decode.
+    Remote covers are downloaded on the event loop first.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=ART_DECODE_WORKERS, thread_name_prefix="album-art"
+        )
+
+        # only touched from the main loop
+        self._cache: OrderedDict[
+            ArtKey, tuple[GdkPixbuf.Pixbuf, tuple[int, int] | None]
+        ] = OrderedDict()
+        self._cache_bytes = 0
+
+        self._thumbnail_directory = Path(STORAGE_DIRECTORY, ART_THUMBNAIL_DIRECTORY)
+        self._executor.submit(self.prune_thumbnails)
+
+        self._loop = asyncio.get_event_loop()
+        self._fetcher = ArtFetcher(
+            Path(STORAGE_DIRECTORY, ART_REMOTE_DIRECTORY),
+            max_size=ART_REMOTE_MAX_SIZE,
+            timeout=ART_REMOTE_TIMEOUT,
+            connections=ART_REMOTE_CONNECTIONS,
+            cache_size=ART_REMOTE_CACHE_SIZE,
+        )
+        self._executor.submit(self._fetcher.prune)
+
+    def close(self):
+        """Closes the pooled art session, call once the main loop has stopped."""
+        self._loop.run_until_complete(self._fetcher.close())
+
+    def load(
+        self,
+        art_url: str,
+        width: int,
+        height: int,
+        callback: Callable[[GdkPixbuf.Pixbuf | None], None],
+    ) -> Gio.Cancellable | None:
+        """
+        Calls back with the scaled cover. Cached covers are handed back
+        immediately and no cancellable is returned.
+        """
+        key = (art_url, width, height)
+        # remote covers are cached by url, so only local files need a stamp
+        stamp = None if is_remote_url(art_url) else get_source_stamp(art_url)
+
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] == stamp:
+            self._cache.move_to_end(key)
+            callback(entry[0])
+            return None
+
+        cancellable = Gio.Cancellable()
+        if is_remote_url(art_url):
+            self._loop.create_task(self.fetch(key, cancellable, callback))
+        else:
+            self._executor.submit(self.decode, key, None, stamp, cancellable, callback)
+        return cancellable
+
+    async def fetch(
+        self,
+        key: ArtKey,
+        cancellable: Gio.Cancellable,
+        callback: Callable[[GdkPixbuf.Pixbuf | None], None],
+    ):
+        # a superseded download still completes so the cover is cached
+        path = await self._fetcher.fetch(key[0])
+        if cancellable.is_cancelled():
+            return
+
+        if path is None:
+            callback(None)
+            return
+
+        self._executor.submit(self.decode, key, str(path), None, cancellable, callback)
+
+    def decode(
+        self,
+        key: ArtKey,
+        path: str | None,
+        stamp: tuple[int, int] | None,
+        cancellable: Gio.Cancellable,
+        callback: Callable[[GdkPixbuf.Pixbuf | None], None],
+    ):
+        """Runs on a worker thread."""
+        if cancellable.is_cancelled():
+            return
+
+        art_url, width, height = key
+        thumbnail_path = self.get_thumbnail_path(key, stamp)
+
+        pixbuf = None
+        try:
+            if thumbnail_path.exists():
+                pixbuf = decode_art(str(thumbnail_path), width, height, cancellable)
+                # keeps recently used thumbnails clear of pruning
+                os.utime(thumbnail_path)
+            else:
+                if path is None:
+                    path = get_file_path_from_mpris_url(art_url)
+                pixbuf = decode_art(path, width, height, cancellable)
+                self.save_thumbnail(pixbuf, thumbnail_path)
+        except GLib.Error as e:
+            if cancellable.is_cancelled():
+                return
+            logger.warning(f"[AlbumArtService] Failed to decode {art_url}: {e}")
+        except ValueError as e:
+            logger.warning(f"[AlbumArtService] Unsupported art url {art_url}: {e}")
+
+        GLib.idle_add(self.deliver, key, stamp, pixbuf, cancellable, callback)
+
+    def deliver(
+        self,
+        key: ArtKey,
+        stamp: tuple[int, int] | None,
+        pixbuf: GdkPixbuf.Pixbuf | None,
+        cancellable: Gio.Cancellable,
+        callback: Callable[[GdkPixbuf.Pixbuf | None], None],
+    ) -> bool:
+        # superseded covers are still worth keeping for the next time around
+        if pixbuf is not None:
+            self.cache_pixbuf(key, stamp, pixbuf)
+
+        # cancellation happens on the main loop, so this check is final
+        if not cancellable.is_cancelled():
+            callback(pixbuf)
+        return False
+
+    def cache_pixbuf(
+        self, key: ArtKey, stamp: tuple[int, int] | None, pixbuf: GdkPixbuf.Pixbuf
+    ):
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cache_bytes -= previous[0].get_byte_length()
+
+        size = pixbuf.get_byte_length()
+        if size > ART_MEMORY_CACHE_SIZE:
+            return
+
+        self._cache[key] = (pixbuf, stamp)
+        self._cache_bytes += size
+
+        while self._cache_bytes > ART_MEMORY_CACHE_SIZE:
+            _, (evicted, _) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.get_byte_length()
+
+    def get_thumbnail_path(self, key: ArtKey, stamp: tuple[int, int] | None) -> Path:
+        art_url, width, height = key
+        digest = hashlib.sha256(
+            f"{art_url}\0{width}x{height}\0{stamp}".encode()
+        ).hexdigest()
+        return self._thumbnail_directory / f"{digest}.png"
+
+    def save_thumbnail(self, pixbuf: GdkPixbuf.Pixbuf, path: Path):
+        """Runs on a worker thread."""
+        try:
+            _, data = pixbuf.save_to_bufferv("png", [], [])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, data)
+        except (GLib.Error, OSError) as e:
+            logger.warning(f"[AlbumArtService] Failed to save thumbnail: {e}")
+
+    def prune_thumbnails(self):
+        """Runs on a worker thread, removes least recently used thumbnails over budget."""
+        try:
+            self._thumbnail_directory.mkdir(parents=True, exist_ok=True)
+            prune_directory(self._thumbnail_directory, ART_THUMBNAIL_CACHE_SIZE)
+        except OSError as e:
+            logger.warning(f"[AlbumArtService] Failed to prune thumbnail cache: {e}")
@@ -0,0 +1,592 @@
+from fabric.core import Service, Property, Signal
+from gi.repository import GLib
+
+from util.singleton import Singleton
+from config.media import HEADPHONES
+import pulsectl
+import math
+import queue
+import threading
+import time
+from loguru import logger
+from typing import Callable
+
+
+RECONNECT_DELAY = 1  # seconds
+
+# event_listen_stop is lost when it lands just before event_listen starts
+# polling, so it is repeated this often until the listener has taken every
+# queued command, nothing runs while the queue is empty
+WAKEUP_RETRY_INTERVAL = 50  # milliseconds
+
+# volume writes are coalesced to at most one per frame
+VOLUME_WRITE_INTERVAL = 16  # milliseconds
+
+# a write that has not completed by then is given up on
+VOLUME_WRITE_TIMEOUT = 1000  # milliseconds
+
+Facility = pulsectl.PulseEventFacilityEnum
+
+HEADPHONE_FORM_FACTORS = ("headphone", "headset")
+HEADPHONE_PORT_KEYWORDS = ("headphone", "headset")
+
+# cached facilities and the property notified when they change
+FACILITY_PROPERTIES = {
+    Facility.sink: "sinks",
+    Facility.source: "sources",
+    Facility.sink_input: "streams",
+}
+
+# facilities with per object added, changed and removed signals
+FACILITY_SIGNALS = {
+    Facility.source: "source",
+    Facility.sink_input: "stream",
+}
+
+
+def is_headphones(sink: pulsectl.PulseSinkInfo) -> bool:
+    """Classifies a sink from its form factor and active port."""
+    if sink.name in HEADPHONES:
+        return True
+
+    if sink.proplist.get("device.form_factor") in HEADPHONE_FORM_FACTORS:
+        return True
+
+    port = sink.port_active
+    if port is not None:
+        port_name = port.name.lower()
+        return any(keyword in port_name for keyword in HEADPHONE_PORT_KEYWORDS)
+
+    return False
+
+
+class AudioService(Service, Singleton):
+    """
+    Owns the shell's single connection to the sound server and a cached
+    model of its sinks, sources and streams.
+
+    The connection lives on a background thread that waits for server
+    events, re-queries only the objects an event names and hands the
+    results back to the GLib main loop. Writes are queued onto the same
+    thread so they never block the main loop.
+
+    Volume writes are applied to the local model immediately and sent to
+    the server at most once per frame with only one request in flight,
+    the latest requested volume always wins.
+    """
+
+    @Signal("changed")
+    def changed(self) -> None: ...
+
+    @Signal("stream-added")
+    def stream_added(self, index: int) -> None: ...
+
+    @Signal("stream-changed")
+    def stream_changed(self, index: int) -> None: ...
+
+    @Signal("stream-removed")
+    def stream_removed(self, index: int) -> None: ...
+
+    @Signal("source-added")
+    def source_added(self, index: int) -> None: ...
+
+    @Signal("source-changed")
+    def source_changed(self, index: int) -> None: ...
+
+    @Signal("source-removed")
+    def source_removed(self, index: int) -> None: ...
+
+    @Property(float, flags="readable")
+    def volume(self) -> float:
+        return self._volume
+
+    @Property(bool, default_value=False, flags="readable")
+    def is_muted(self) -> bool:
+        return self._muted
+
+    @Property(object, flags="readable")
+    def default_sink(self) -> pulsectl.PulseSinkInfo | None:
+        return self._default_sink
+
+    @Property(bool, default_value=False, flags="readable")
+    def headphones_active(self) -> bool:
+        return self._headphones_active
+
+    @Property(object, flags="readable")
+    def sinks(self) -> list[pulsectl.PulseSinkInfo]:
+        return list(self._caches[Facility.sink].values())
+
+    @Property(object, flags="readable")
+    def sources(self) -> list[pulsectl.PulseSourceInfo]:
+        return list(self._caches[Facility.source].values())
+
+    @Property(object, flags="readable")
+    def streams(self) -> list[pulsectl.PulseSinkInputInfo]:
+        return list(self._caches[Facility.sink_input].values())
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._volume = 0.0
+        self._muted = False
+        self._default_sink = None
+        self._default_sink_name = None
+        self._headphones_active = False
+
+        # sink indexes in server order and the position of each sink name,
+        # rebuilt only when sinks come or go so lookups and rotation are O(1)
+        self._sink_order: list[int] = []
+        self._sink_positions: dict[str, int] = {}
+
+        self._pending_volume: float | None = None
+        self._volume_write_timer: int | None = None
+        self._volume_write_in_flight = False
+        # identifies the write in flight so late completions are ignored
+        self._volume_write_serial = 0
+        self._volume_write_deadline: int | None = None
+
+        # stream and source writes keyed by facility and index, latest wins
+        self._pending_writes: dict[tuple, Callable[[pulsectl.Pulse], None]] = {}
+        self._write_timer: int | None = None
+        # serial of the flush that last wrote each key, until it has landed
+        self._writes_in_flight: dict[tuple, int] = {}
+        self._write_serial = 0
+
+        # main loop side cache, only touched from the main loop
+        self._caches = {facility: {} for facility in FACILITY_PROPERTIES}
+
+        # listener thread side state
+        self._pulse: pulsectl.Pulse | None = None
+        self._events: dict[tuple, pulsectl.PulseEventInfo] = {}
+        self._commands: queue.SimpleQueue = queue.SimpleQueue()
+        self._wakeup_timer: int | None = None
+
+        self._listener = threading.Thread(
+            target=self.listen, name="audio-listener", daemon=True
+        )
+        self._listener.start()
+
+    # listener thread
+
+    def listen(self):
+        """Runs on the listener thread, which owns the pulse connection."""
+        while True:
+            try:
+                with pulsectl.Pulse("fabric-shell") as pulse:
+                    pulse.event_mask_set("sink", "source", "sink_input", "server")
+                    pulse.event_callback_set(self.on_pulse_event)
+                    self._pulse = pulse
+
+                    self.load_state(pulse)
+                    while True:
+                        self.process_events(pulse)
+                        self.run_commands(pulse)
+                        # commands queued while we were busy would otherwise
+                        # wait for the next wakeup
+                        if not self._commands.empty():
+                            continue
+                        # blocks until an event arrives or a command is queued
+                        pulse.event_listen()
+            except pulsectl.PulseError as e:
+                logger.warning(f"Lost connection to sound server: {e}")
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                self._pulse = None
+                self._events.clear()
+
+    def on_pulse_event(self, event: pulsectl.PulseEventInfo):
+        # pulse calls are not allowed inside the callback, collect the
+        # event and leave the event loop to query from the thread instead
+        self._events[(event.facility, event.index)] = event
+        raise pulsectl.PulseLoopStop
+
+    def load_state(self, pulse: pulsectl.Pulse):
+        caches = {
+            Facility.sink: {sink.index: sink for sink in pulse.sink_list()},
+            Facility.source: {source.index: source for source in pulse.source_list()},
+            Facility.sink_input: {
+                stream.index: stream for stream in pulse.sink_input_list()
+            },
+        }
+        GLib.idle_add(self.apply_state, caches, pulse.server_info())
+
+    def process_events(self, pulse: pulsectl.Pulse):
+        if not self._events:
+            return
+
+        events = self._events
+        self._events = {}
+
+        updates = []
+        server_info = None
+        for (facility, index), event in events.items():
+            if facility == Facility.server:
+                server_info = pulse.server_info()
+                continue
+
+            if facility not in FACILITY_PROPERTIES:
+                continue
+
+            info = None
+            if event.t != pulsectl.PulseEventTypeEnum.remove:
+                info = self.query_info(pulse, facility, index)
+            updates.append((facility, index, info))
+
+        GLib.idle_add(self.apply_updates, updates, server_info)
+
+    def query_info(self, pulse: pulsectl.Pulse, facility, index: int):
+        try:
+            if facility == Facility.sink:
+                return pulse.sink_info(index)
+            elif facility == Facility.source:
+                return pulse.source_info(index)
+            else:
+                return pulse.sink_input_info(index)
+        except pulsectl.PulseIndexError:
+            # removed before we got to it
+            return None
+
+    def run_commands(self, pulse: pulsectl.Pulse):
+        while not self._commands.empty():
+            command = self._commands.get_nowait()
+            try:
+                command(pulse)
+            except (pulsectl.PulseOperationFailed, pulsectl.PulseIndexError) as e:
+                logger.error(f"Sound server command failed: {e}")
+            except pulsectl.PulseError:
+                # connection errors are handled by listen
+                raise
+            except Exception:
+                # a bad command must never take the listener thread down
+                logger.exception("Sound server command raised")
+
+    def submit(self, command: Callable[[pulsectl.Pulse], None]):
+        """Queues command to run on the listener thread with the connection."""
+        self._commands.put(command)
+        if self.wake_listener() and self._wakeup_timer is None:
+            self._wakeup_timer = GLib.timeout_add(
+                WAKEUP_RETRY_INTERVAL, self.on_wakeup_retry
+            )
+
+    def wake_listener(self) -> bool:
+        """Interrupts event_listen, returns whether commands are still waiting."""
+        pulse = self._pulse
+        # once reconnected the listener runs the queue before it blocks
+        if pulse is None or self._commands.empty():
+            return False
+        pulse.event_listen_stop()
+        return True
+
+    def on_wakeup_retry(self) -> bool:
+        # the listener taking the commands is the acknowledgement
+        if self.wake_listener():
+            return True
+        self._wakeup_timer = None
+        return False
+
+    # main loop
+
+    def apply_state(self, caches: dict, server_info) -> bool:
+        previous_caches = self._caches
+        self._caches = caches
+        for name in FACILITY_PROPERTIES.values():
+            self.notify(name)
+
+        # diff against the previous connection so rows update incrementally
+        for facility, prefix in FACILITY_SIGNALS.items():
+            previous = previous_caches[facility]
+            for index in previous.keys() - caches[facility].keys():
+                self.emit(f"{prefix}-removed", index)
+            for index in caches[facility]:
+                self.emit(
+                    f"{prefix}-changed" if index in previous else f"{prefix}-added",
+                    index,
+                )
+
+        self.rebuild_sink_index()
+
+        # a write in flight on a lost connection will never complete
+        if self._volume_write_in_flight:
+            self.finish_volume_write()
+        # rows were just refreshed from the new state, late completions
+        # of writes from the old connection are ignored
+        self._writes_in_flight.clear()
+
+        self._default_sink_name = server_info.default_sink_name
+        self.update_default_sink()
+        return False
+
+    def apply_updates(self, updates: list, server_info) -> bool:
+        changed_facilities = set()
+        sinks_added_or_removed = False
+        for facility, index, info in updates:
+            cache = self._caches[facility]
+            if info is None:
+                existed = cache.pop(index, None) is not None
+                signal = "removed" if existed else None
+            else:
+                signal = "changed" if index in cache else "added"
+                cache[index] = info
+            changed_facilities.add(facility)
+
+            if facility == Facility.sink:
+                sinks_added_or_removed |= signal in ("added", "removed")
+            elif signal is not None:
+                self.emit(f"{FACILITY_SIGNALS[facility]}-{signal}", index)
+
+        for facility in changed_facilities:
+            self.notify(FACILITY_PROPERTIES[facility])
+
+        if Facility.sink in changed_facilities and sinks_added_or_removed:
+            self.rebuild_sink_index()
+
+        if server_info is not None:
+            self._default_sink_name = server_info.default_sink_name
+
+        if server_info is not None or Facility.sink in changed_facilities:
+            self.update_default_sink()
+        return False
+
+    def rebuild_sink_index(self):
+        sinks = self._caches[Facility.sink]
+        self._sink_order = sorted(sinks)
+        self._sink_positions = {
+            sinks[index].name: position
+            for position, index in enumerate(self._sink_order)
+        }
+
+    def update_default_sink(self):
+        default_sink = None
+        position = self._sink_positions.get(self._default_sink_name)
+        if position is not None:
+            default_sink = self._caches[Facility.sink][self._sink_order[position]]
+
+        previous_name = self._default_sink.name if self._default_sink else None
+        self._default_sink = default_sink
+        if (default_sink.name if default_sink else None) != previous_name:
+            self.notify("default-sink")
+
+        headphones_active = default_sink is not None and is_headphones(default_sink)
+        if headphones_active != self._headphones_active:
+            self._headphones_active = headphones_active
+            self.notify("headphones-active")
+
+        if default_sink is None:
+            return
+
+        if self._volume_write_in_flight or self._pending_volume is not None:
+            # keep the optimistic value until our own writes have landed
+            return
+
+        volume = default_sink.volume.value_flat
+        is_muted = bool(default_sink.mute)
+        if volume != self._volume or is_muted != self._muted:
+            self._volume = volume
+            self._muted = is_muted
+            self.notify("volume")
+            self.notify("is-muted")
+            self.changed()
+
+    def set_volume(self, volume: float):
+        """Sets the default sink volume, unmuting it if the volume is raised."""
+        if self._default_sink is None or not math.isfinite(volume):
+            return
+
+        volume = min(max(volume, 0.0), 1.0)
+
+        # update optimistically so the bar and osd follow immediately
+        if volume != self._volume or (self._muted and volume > 0):
+            self._volume = volume
+            self._muted = self._muted and volume == 0
+            self.notify("volume")
+            self.notify("is-muted")
+            self.changed()
+
+        self._pending_volume = volume
+        if self._volume_write_timer is None and not self._volume_write_in_flight:
+            self._volume_write_timer = GLib.timeout_add(
+                VOLUME_WRITE_INTERVAL, self.flush_volume
+            )
+
+    def flush_volume(self) -> bool:
+        self._volume_write_timer = None
+
+        sink = self._default_sink
+        volume = self._pending_volume
+        self._pending_volume = None
+        if sink is None or volume is None:
+            return False
+
+        channels = len(sink.volume.values)
+        unmute = sink.mute and volume > 0
+
+        self._volume_write_serial += 1
+        serial = self._volume_write_serial
+
+        def command(pulse: pulsectl.Pulse):
+            try:
+                if unmute:
+                    pulse.sink_mute(sink.index, False)
+                pulse.sink_volume_set(
+                    sink.index, pulsectl.PulseVolumeInfo(volume, channels)
+                )
+            finally:
+                GLib.idle_add(self.on_volume_written, serial)
+
+        self._volume_write_in_flight = True
+        self._volume_write_deadline = GLib.timeout_add(
+            VOLUME_WRITE_TIMEOUT, self.on_volume_write_timeout
+        )
+        self.submit(command)
+        return False
+
+    def on_volume_written(self, serial: int) -> bool:
+        # completions of writes already given up on are stale
+        if self._volume_write_in_flight and serial == self._volume_write_serial:
+            self.finish_volume_write()
+        return False
+
+    def on_volume_write_timeout(self) -> bool:
+        self._volume_write_deadline = None
+        logger.warning("Volume write timed out, resuming with the latest volume")
+        self.finish_volume_write()
+        return False
+
+    def finish_volume_write(self):
+        self._volume_write_in_flight = False
+        self._volume_write_serial += 1
+        if self._volume_write_deadline is not None:
+            GLib.source_remove(self._volume_write_deadline)
+            self._volume_write_deadline = None
+
+        if self._pending_volume is not None:
+            if self._volume_write_timer is None:
+                self._volume_write_timer = GLib.timeout_add(
+                    VOLUME_WRITE_INTERVAL, self.flush_volume
+                )
+        else:
+            # reconcile with whatever the server reported meanwhile
+            self.update_default_sink()
+
+    def set_muted(self, is_muted: bool):
+        sink = self._default_sink
+        if sink is None:
+            return
+
+        if is_muted != self._muted:
+            self._muted = is_muted
+            self.notify("is-muted")
+            self.changed()
+
+        self.submit(lambda pulse: pulse.sink_mute(sink.index, is_muted))
+
+    def get_stream(self, index: int) -> pulsectl.PulseSinkInputInfo | None:
+        return self._caches[Facility.sink_input].get(index)
+
+    def get_source(self, index: int) -> pulsectl.PulseSourceInfo | None:
+        return self._caches[Facility.source].get(index)
+
+    def submit_coalesced(self, key: tuple, command: Callable[[pulsectl.Pulse], None]):
+        """Queues command, replacing any pending command with the same key."""
+        self._pending_writes[key] = command
+        if self._write_timer is None:
+            self._write_timer = GLib.timeout_add(
+                VOLUME_WRITE_INTERVAL, self.flush_writes
+            )
+
+    def flush_writes(self) -> bool:
+        self._write_timer = None
+        keys = list(self._pending_writes)
+        commands = list(self._pending_writes.values())
+        self._pending_writes.clear()
+
+        self._write_serial += 1
+        serial = self._write_serial
+        for key in keys:
+            self._writes_in_flight[key] = serial
+
+        def command(pulse: pulsectl.Pulse):
+            try:
+                for write in commands:
+                    try:
+                        write(pulse)
+                    except (
+                        pulsectl.PulseOperationFailed,
+                        pulsectl.PulseIndexError,
+                    ) as e:
+                        logger.debug(f"Dropped write for a vanished object: {e}")
+            finally:
+                GLib.idle_add(self.on_writes_landed, keys, serial)
+
+        self.submit(command)
+        return False
+
+    def on_writes_landed(self, keys: list[tuple], serial: int) -> bool:
+        for key in keys:
+            # a later flush wrote this object again, wait for that one
+            if self._writes_in_flight.get(key) != serial:
+                continue
+            del self._writes_in_flight[key]
+
+            if key in self._pending_writes:
+                continue
+            # updates skipped while the write was pending are caught up on
+            facility, index = key
+            if index in self._caches[facility]:
+                self.emit(f"{FACILITY_SIGNALS[facility]}-changed", index)
+        return False
+
+    def is_write_pending(self, facility, index: int) -> bool:
+        """Whether a volume written to the object has not landed yet."""
+        key = (facility, index)
+        return key in self._pending_writes or key in self._writes_in_flight
+
+    def is_stream_volume_pending(self, index: int) -> bool:
+        return self.is_write_pending(Facility.sink_input, index)
+
+    def is_source_volume_pending(self, index: int) -> bool:
+        return self.is_write_pending(Facility.source, index)
+
+    def set_stream_volume(self, index: int, volume: float):
+        stream = self.get_stream(index)
+        if stream is None:
+            return
+
+        volume_info = pulsectl.PulseVolumeInfo(
+            min(max(volume, 0.0), 1.0), len(stream.volume.values)
+        )
+        self.submit_coalesced(
+            (Facility.sink_input, index),
+            lambda pulse: pulse.sink_input_volume_set(index, volume_info),
+        )
+
+    def set_stream_muted(self, index: int, is_muted: bool):
+        self.submit(lambda pulse: pulse.sink_input_mute(index, is_muted))
+
+    def set_source_volume(self, index: int, volume: float):
+        source = self.get_source(index)
+        if source is None:
+            return
+
+        volume_info = pulsectl.PulseVolumeInfo(
+            min(max(volume, 0.0), 1.0), len(source.volume.values)
+        )
+        self.submit_coalesced(
+            (Facility.source, index),
+            lambda pulse: pulse.source_volume_set(index, volume_info),
+        )
+
+    def set_source_muted(self, index: int, is_muted: bool):
+        self.submit(lambda pulse: pulse.source_mute(index, is_muted))
+
+    def set_default_sink(self, name: str):
+        self.submit(lambda pulse: pulse.sink_default_set(name))
+
+    def rotate_default_sink(self):
+        """Switches output to the next sink in server order."""
+        if not self._sink_order:
+            return
+
+        position = self._sink_positions.get(self._default_sink_name, -1)
+        next_index = self._sink_order[(position + 1) % len(self._sink_order)]
+        self.set_default_sink(self._caches[Facility.sink][next_index].name)
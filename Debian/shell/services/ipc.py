@@ -0,0 +1,246 @@
+from fabric.core.service import Service
+
+from util.singleton import Singleton
+from services.system_metrics import SystemMetricsService
+from services.audio import AudioService
+from config.ipc import (
+    SOCKET_NAME,
+    MAX_SUBSCRIBER_BUFFER,
+    VOLUME_STEP,
+    WOB_SOCKET_NAME,
+)
+
+import asyncio
+import json
+import math
+import os
+from loguru import logger
+
+# subscribers should not send anything, whatever they do is read and
+# dropped in chunks this size so it never piles up
+DISCARD_CHUNK_SIZE = 4096  # bytes
+
+
+def parse_volume(value: str) -> float:
+    volume = float(value)
+    # nan and inf would get through clamping and poison the audio model
+    if not math.isfinite(volume):
+        raise ValueError(f"volume must be finite: {value}")
+    return volume
+
+
+def escape_label_value(value: str) -> str:
+    """Escapes a Prometheus label value as the text format requires."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class IPCService(Service, Singleton):
+    """
+    Serves the shell's current system metrics and audio state over a UNIX
+    socket so scripts can reuse them instead of polling or spawning
+    processes. Clients send one command per line:
+
+        snapshot    one line of JSON, then the connection is closed
+        subscribe   one line of JSON now and another on every change
+        prometheus  Prometheus text exposition format
+
+    Volume keybinds send commands through the same socket, each replies
+    with the resulting audio state:
+
+        volume up [step] | volume down [step] | volume set <0-1>
+        mute [on|off|toggle]
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._loop = asyncio.get_event_loop()
+
+        self.metrics_service = SystemMetricsService.get_instance()
+        self.audio_service = AudioService.get_instance()
+
+        runtime_dir = os.getenv("XDG_RUNTIME_DIR", "/tmp")
+        self.socket_path = os.path.join(runtime_dir, SOCKET_NAME)
+        self.wob_path = os.path.join(runtime_dir, WOB_SOCKET_NAME)
+
+        self._subscribers: set[asyncio.StreamWriter] = set()
+        self._last_line = None
+
+        self.metrics_service.connect("sampled", self.publish)
+        self.audio_service.connect("changed", self.publish)
+        self.audio_service.connect("changed", self.forward_to_wob)
+
+        self._loop.create_task(self.start())
+
+    async def start(self):
+        try:
+            # clean up after a previous instance that did not exit cleanly
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+            await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        except OSError as e:
+            logger.error(f"Could not open IPC socket {self.socket_path}: {e}")
+        else:
+            logger.info(f"Serving IPC socket at {self.socket_path}")
+
+    def get_snapshot(self) -> dict:
+        metrics = self.metrics_service
+        return {
+            "cpu": metrics.cpu,
+            "cores": list(metrics.get_core_usage()),
+            "gpu": metrics.gpu if metrics.gpu_available else None,
+            "gpu_memory": metrics.gpu_memory if metrics.gpu_available else None,
+            "ram": metrics.ram,
+            "disk": metrics.disk,
+            "disk_usage": metrics.disk_usage,
+            "disk_throughput": {
+                device: {"read": read, "write": written}
+                for device, (read, written) in metrics.disk_throughput.items()
+            },
+            "audio": {
+                "volume": self.audio_service.volume,
+                "muted": self.audio_service.is_muted,
+            },
+        }
+
+    def get_snapshot_line(self) -> bytes:
+        return json.dumps(self.get_snapshot(), separators=(",", ":")).encode() + b"\n"
+
+    def get_prometheus_text(self) -> bytes:
+        snapshot = self.get_snapshot()
+        lines = [
+            "# TYPE shell_cpu_percent gauge",
+            f"shell_cpu_percent {snapshot['cpu']}",
+            "# TYPE shell_cpu_core_percent gauge",
+        ]
+        lines += [
+            f'shell_cpu_core_percent{{core="{core}"}} {percent}'
+            for core, percent in enumerate(snapshot["cores"])
+        ]
+        if snapshot["gpu"] is not None:
+            lines += [
+                "# TYPE shell_gpu_percent gauge",
+                f"shell_gpu_percent {snapshot['gpu']}",
+                "# TYPE shell_gpu_memory_percent gauge",
+                f"shell_gpu_memory_percent {snapshot['gpu_memory']}",
+            ]
+        lines += [
+            "# TYPE shell_ram_percent gauge",
+            f"shell_ram_percent {snapshot['ram']}",
+            "# TYPE shell_disk_usage_percent gauge",
+        ]
+        lines += [
+            f'shell_disk_usage_percent{{mount="{escape_label_value(mount)}"}} {percent}'
+            for mount, percent in snapshot["disk_usage"].items()
+        ]
+        lines.append("# TYPE shell_disk_bytes_per_second gauge")
+        for device, rates in snapshot["disk_throughput"].items():
+            device = escape_label_value(device)
+            lines += [
+                f'shell_disk_bytes_per_second{{device="{device}",direction="{direction}"}} {rate}'
+                for direction, rate in rates.items()
+            ]
+        lines += [
+            "# TYPE shell_audio_volume gauge",
+            f"shell_audio_volume {snapshot['audio']['volume']}",
+            "# TYPE shell_audio_muted gauge",
+            f"shell_audio_muted {int(snapshot['audio']['muted'])}",
+        ]
+        return ("\n".join(lines) + "\n").encode()
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            command = (await reader.readline()).decode().strip()
+            name, *arguments = command.split() or [""]
+
+            if name in ("volume", "mute"):
+                writer.write(self.run_audio_command(name, arguments))
+            elif command in ("", "snapshot"):
+                writer.write(self.get_snapshot_line())
+            elif command == "prometheus":
+                writer.write(self.get_prometheus_text())
+            elif command == "subscribe":
+                writer.write(self.get_snapshot_line())
+                self._subscribers.add(writer)
+                # keep the connection until the client hangs up
+                while await reader.read(DISCARD_CHUNK_SIZE):
+                    pass
+                self._subscribers.discard(writer)
+            else:
+                writer.write(
+                    json.dumps({"error": f"unknown command: {command}"}).encode()
+                    + b"\n"
+                )
+
+            await writer.drain()
+        except (ConnectionError, UnicodeDecodeError) as e:
+            logger.debug(f"IPC client error: {e}")
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def run_audio_command(self, name: str, arguments: list[str]) -> bytes:
+        audio = self.audio_service
+        try:
+            if name == "mute":
+                action = arguments[0] if arguments else "toggle"
+                if action not in ("on", "off", "toggle"):
+                    raise ValueError(f"unknown mute action: {action}")
+                audio.set_muted(
+                    not audio.is_muted if action == "toggle" else action == "on"
+                )
+            else:
+                action = arguments[0]
+                if action == "set":
+                    audio.set_volume(parse_volume(arguments[1]))
+                elif action in ("up", "down"):
+                    step = VOLUME_STEP
+                    if len(arguments) > 1:
+                        step = parse_volume(arguments[1])
+                    audio.set_volume(
+                        audio.volume + (step if action == "up" else -step)
+                    )
+                else:
+                    raise ValueError(f"unknown volume action: {action}")
+        except (IndexError, ValueError) as e:
+            response = {"error": f"invalid command: {e}"}
+        else:
+            # set_volume and set_muted update the model optimistically
+            response = {"volume": audio.volume, "muted": audio.is_muted}
+
+        return json.dumps(response).encode() + b"\n"
+
+    def forward_to_wob(self, *args):
+        try:
+            # non blocking so a missing wob reader never stalls the shell
+            fd = os.open(self.wob_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            return
+
+        percent = 0 if self.audio_service.is_muted else self.audio_service.volume * 100
+        try:
+            os.write(fd, f"{round(percent)}\n".encode())
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def publish(self, *args):
+        if not self._subscribers:
+            return
+
+        line = self.get_snapshot_line()
+        if line == self._last_line:
+            return
+        self._last_line = line
+
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                # slow consumer, drop it rather than buffer forever
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
@@ -0,0 +1,337 @@
+import time
+
+from fabric.core.service import Service, Property, Signal
+from gi.repository import GLib, Gio, Playerctl
+
+from util.singleton import Singleton
+from config.media import METADATA_COALESCE_INTERVAL
+
+METADATA_FIELDS = ("title", "artist", "album", "art_url")
+
+
+def get_metadata_fields(metadata) -> dict[str, str]:
+    """The metadata fields shown by media widgets."""
+    keys = metadata.keys()
+    artists = metadata["xesam:artist"] if "xesam:artist" in keys else []
+    return {
+        "title": metadata["xesam:title"] if "xesam:title" in keys else "",
+        "artist": artists[0] if artists else "",
+        "album": metadata["xesam:album"] if "xesam:album" in keys else "",
+        "art_url": metadata["mpris:artUrl"] if "mpris:artUrl" in keys else "",
+    }
+
+
+class MediaService(Service, Singleton):
+    """
+    Tracks every MPRIS player and follows the one whose playback changed
+    most recently. Widgets read the active player's state through the
+    properties below instead of holding players of their own.
+
+    Metadata is diffed per player and bursts are coalesced, so
+    metadata-changed fires once per real change with the changed fields.
+
+    MPRIS does not announce position changes, so the position is derived
+    from the last reported position, when it was reported and the
+    playback rate. It is only re-read when playback status, the track or
+    the rate changes and taken from the seeked signal otherwise, nothing
+    polls the player.
+    """
+
+    @Signal
+    def metadata_changed(self, changed: object) -> None: ...
+
+    # the position jumped, in between it advances at the playback rate
+    @Signal
+    def position_changed(self) -> None: ...
+
+    @Property(object, flags="readable")
+    def active_player(self) -> Playerctl.Player | None:
+        return self._active_player
+
+    @Property(object, flags="readable")
+    def players(self) -> list[Playerctl.Player]:
+        return list(self._players.values())
+
+    @Property(bool, default_value=False, flags="readable")
+    def is_playing(self) -> bool:
+        return self._is_playing
+
+    @Property(str, flags="readable")
+    def title(self) -> str:
+        return self._fields["title"]
+
+    @Property(str, flags="readable")
+    def artist(self) -> str:
+        return self._fields["artist"]
+
+    @Property(str, flags="readable")
+    def album(self) -> str:
+        return self._fields["album"]
+
+    @Property(str, flags="readable")
+    def art_url(self) -> str:
+        return self._fields["art_url"]
+
+    @Property(float, flags="readable")
+    def length(self) -> float:
+        """Track length in seconds, 0 when the player does not report one."""
+        return self._length
+
+    @Property(bool, default_value=False, flags="readable")
+    def can_seek(self) -> bool:
+        return self._active_player is not None and self._active_player.props.can_seek
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._active_player: Playerctl.Player | None = None
+        self._is_playing = False
+        self._fields = dict.fromkeys(METADATA_FIELDS, "")
+        self._length = 0.0
+
+        # position in seconds when last reported, the monotonic time it was
+        # reported at and the rate it advances at while playing
+        self._position = 0.0
+        self._position_time = 0.0
+        self._rate = 1.0
+
+        # everything below is keyed by player instance name
+        self._players: dict[str, Playerctl.Player] = {}
+        self._handlers: dict[str, list[int]] = {}
+        # when each player's playback status last changed
+        self._activity: dict[str, float] = {}
+        # last metadata fields received from each player
+        self._snapshots: dict[str, dict[str, str]] = {}
+        # property caches for the playback rate, which playerctl does not expose
+        self._proxies: dict[str, Gio.DBusProxy] = {}
+
+        self._metadata_timer: int | None = None
+
+        self._manager = Playerctl.PlayerManager()
+        self._manager.connect("name-appeared", self.on_name_appeared)
+        self._manager.connect("player-vanished", self.on_player_vanished)
+
+        for name in self._manager.props.player_names:
+            self.init_player(name)
+
+    def init_player(self, name: Playerctl.PlayerName):
+        player = Playerctl.Player.new_from_name(name)
+        instance = player.props.player_instance
+
+        self._players[instance] = player
+        self._handlers[instance] = [
+            player.connect("playback-status", self.on_playback_status),
+            player.connect("metadata", self.on_metadata),
+            player.connect("seeked", self.on_seeked),
+        ]
+        self._snapshots[instance] = get_metadata_fields(player.props.metadata)
+        # a player that is already playing wins over idle ones
+        is_playing = player.props.playback_status == Playerctl.PlaybackStatus.PLAYING
+        self._activity[instance] = time.monotonic() if is_playing else 0.0
+
+        Gio.DBusProxy.new_for_bus(
+            Gio.BusType.SESSION,
+            Gio.DBusProxyFlags.DO_NOT_AUTO_START,
+            None,
+            f"org.mpris.MediaPlayer2.{instance}",
+            "/org/mpris/MediaPlayer2",
+            "org.mpris.MediaPlayer2.Player",
+            None,
+            self.on_proxy_ready,
+            instance,
+        )
+
+        self._manager.manage_player(player)
+        self.update_active_player()
+
+    def on_proxy_ready(self, source, result, instance: str):
+        try:
+            proxy = Gio.DBusProxy.new_for_bus_finish(result)
+        except GLib.Error:
+            return
+
+        # the player may have vanished in the meantime
+        if instance not in self._players:
+            return
+
+        self._proxies[instance] = proxy
+        proxy.connect("g-properties-changed", self.on_properties_changed, instance)
+        if self.is_active(instance):
+            self.refresh_position()
+
+    def on_name_appeared(self, manager, name):
+        """Automatically add new players to manager."""
+        self.init_player(name)
+
+    def on_player_vanished(self, manager, player):
+        instance = player.props.player_instance
+        if instance not in self._players:
+            return
+
+        for handler_id in self._handlers.pop(instance):
+            player.disconnect(handler_id)
+        del self._players[instance]
+        del self._activity[instance]
+        del self._snapshots[instance]
+
+        proxy = self._proxies.pop(instance, None)
+        if proxy is not None:
+            proxy.disconnect_by_func(self.on_properties_changed)
+
+        self.update_active_player()
+
+    def is_active(self, instance: str) -> bool:
+        return (
+            self._active_player is not None
+            and self._active_player.props.player_instance == instance
+        )
+
+    def on_playback_status(self, player, status):
+        self._activity[player.props.player_instance] = time.monotonic()
+        # switching players already takes a new reference point
+        if not self.update_active_player():
+            self.update_is_playing()
+            if player is self._active_player:
+                self.refresh_position()
+
+    def on_seeked(self, player, position: int):
+        if player is self._active_player:
+            self.refresh_position(position)
+
+    def on_properties_changed(self, proxy, changed, invalidated, instance: str):
+        if "Rate" in changed.keys() and self.is_active(instance):
+            self.refresh_position()
+
+    def on_metadata(self, player, metadata):
+        instance = player.props.player_instance
+        fields = get_metadata_fields(metadata)
+
+        if player is self._active_player:
+            self.update_length(metadata)
+
+        # players re-send identical metadata constantly
+        if self._snapshots.get(instance) == fields:
+            return
+        self._snapshots[instance] = fields
+
+        if player is self._active_player:
+            # a new track, the old position no longer applies
+            self.refresh_position()
+            self.notify("can-seek")
+            self.schedule_metadata()
+
+    def update_active_player(self) -> bool:
+        """Follows the most recently active player, returns whether it changed."""
+        instance = max(self._activity, key=self._activity.get, default=None)
+        player = self._players.get(instance)
+        if player is self._active_player:
+            return False
+
+        self._active_player = player
+        self.notify("active-player")
+        self.notify("can-seek")
+        self.update_is_playing()
+        self.update_length(player.props.metadata if player is not None else None)
+        self.refresh_position()
+        self.schedule_metadata()
+        return True
+
+    def update_is_playing(self):
+        is_playing = (
+            self._active_player is not None
+            and self._active_player.props.playback_status
+            == Playerctl.PlaybackStatus.PLAYING
+        )
+        if is_playing != self._is_playing:
+            self._is_playing = is_playing
+            self.notify("is-playing")
+
+    def update_length(self, metadata):
+        length = 0.0
+        if metadata is not None and "mpris:length" in metadata.keys():
+            length = metadata["mpris:length"] / 1_000_000
+
+        if length != self._length:
+            self._length = length
+            self.notify("length")
+
+    def refresh_position(self, position: int | None = None):
+        """
+        Takes a new reference point, position is in microseconds and read
+        from the player when not given.
+        """
+        player = self._active_player
+        if player is None:
+            self._position = 0.0
+            self._rate = 1.0
+        else:
+            if position is None:
+                position = player.props.position
+            self._position = position / 1_000_000
+            self._rate = self.get_rate(player.props.player_instance)
+
+        self._position_time = time.monotonic()
+        self.position_changed()
+
+    def get_rate(self, instance: str) -> float:
+        proxy = self._proxies.get(instance)
+        rate = proxy.get_cached_property("Rate") if proxy is not None else None
+        return rate.unpack() if rate is not None else 1.0
+
+    def get_position(self) -> float:
+        """Current position in seconds, computed without asking the player."""
+        position = self._position
+        if self._is_playing:
+            position += (time.monotonic() - self._position_time) * self._rate
+
+        if self._length > 0:
+            position = min(position, self._length)
+        return max(position, 0.0)
+
+    def set_position(self, position: float):
+        """Seeks the active player to position in seconds."""
+        if self._active_player is None or not self._active_player.props.can_seek:
+            return
+
+        self._active_player.set_position(int(position * 1_000_000))
+        # players confirm with seeked, show the new position until then
+        self.refresh_position(int(position * 1_000_000))
+
+    def schedule_metadata(self):
+        # a burst within one frame becomes a single update
+        if self._metadata_timer is None:
+            self._metadata_timer = GLib.timeout_add(
+                METADATA_COALESCE_INTERVAL, self.apply_metadata
+            )
+
+    def apply_metadata(self) -> bool:
+        self._metadata_timer = None
+
+        fields = dict.fromkeys(METADATA_FIELDS, "")
+        if self._active_player is not None:
+            fields = self._snapshots[self._active_player.props.player_instance]
+
+        changed = {
+            name for name, value in fields.items() if self._fields[name] != value
+        }
+        if not changed:
+            return False
+
+        self._fields = fields
+        for name in changed:
+            self.notify(name.replace("_", "-"))
+        self.metadata_changed(changed)
+
+        return False
+
+    def play_pause(self):
+        if self._active_player is not None:
+            self._active_player.play_pause()
+
+    def previous(self):
+        if self._active_player is not None:
+            self._active_player.previous()
+
+    def next(self):
+        if self._active_player is not None:
+            self._active_player.next()
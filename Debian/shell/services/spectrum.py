@@ -0,0 +1,218 @@
+import subprocess
+
+import numpy as np
+from fabric.core.service import Service, Property, Signal
+from gi.repository import GLib
+from loguru import logger
+
+from util.singleton import Singleton
+from services.audio import AudioService
+from config.spectrum import (
+    SPECTRUM_BANDS,
+    SPECTRUM_SAMPLE_RATE,
+    SPECTRUM_FFT_SIZE,
+    SPECTRUM_HOP_SIZE,
+    SPECTRUM_MIN_FREQUENCY,
+    SPECTRUM_MAX_FREQUENCY,
+    SPECTRUM_FLOOR_DB,
+    SPECTRUM_DECAY,
+)
+
+
+def get_band_edges(
+    bands: int, fft_size: int, sample_rate: int, min_freq: float, max_freq: float
+) -> tuple[np.ndarray, int]:
+    """
+    FFT bin where each logarithmic band starts and the bin after the last
+    band ends. Low bands narrower than a bin are widened to one bin so the
+    starts are strictly increasing, as reduceat requires.
+    """
+    bin_width = sample_rate / fft_size
+    edges = np.geomspace(min_freq, max_freq, bands + 1) / bin_width
+
+    starts = np.empty(bands, dtype=np.intp)
+    previous = 0
+    for band in range(bands):
+        previous = max(int(edges[band]), previous + 1)
+        starts[band] = previous
+
+    end = min(max(int(edges[-1]) + 1, previous + 1), fft_size // 2 + 1)
+    return starts, end
+
+
+class SpectrumService(Service, Singleton):
+    """
+    Frequency spectrum of the default sink's monitor, captured with parec.
+
+    Samples are read straight into a preallocated buffer and every window
+    is analysed with a handful of vectorized NumPy calls, so the service is
+    cheap enough to leave running. Capture only happens while active, and
+    follows the default sink, starting once one appears.
+    """
+
+    @Signal
+    def updated(self) -> None: ...
+
+    @Property(bool, default_value=False, flags="readable")
+    def active(self) -> bool:
+        return self._process is not None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.audio_service = AudioService.get_instance()
+
+        # band levels between 0 and 1, updated in place
+        self.bands = np.zeros(SPECTRUM_BANDS, dtype=np.float32)
+
+        self._samples = np.zeros(SPECTRUM_FFT_SIZE, dtype=np.float32)
+        self._windowed = np.empty(SPECTRUM_FFT_SIZE, dtype=np.float32)
+        self._window = np.hanning(SPECTRUM_FFT_SIZE).astype(np.float32)
+        self._magnitudes = np.empty(SPECTRUM_FFT_SIZE // 2 + 1, dtype=np.float32)
+        # amplitude of a full scale sine becomes 1
+        self._magnitude_scale = 2.0 / self._window.sum()
+
+        self._chunk = np.empty(SPECTRUM_HOP_SIZE, dtype=np.float32)
+        self._chunk_bytes = memoryview(self._chunk).cast("B")
+        self._chunk_filled = 0
+
+        self._band_starts, self._band_end = get_band_edges(
+            SPECTRUM_BANDS,
+            SPECTRUM_FFT_SIZE,
+            SPECTRUM_SAMPLE_RATE,
+            SPECTRUM_MIN_FREQUENCY,
+            SPECTRUM_MAX_FREQUENCY,
+        )
+
+        # whether capture was asked for, it can only run while there is
+        # a default sink to monitor
+        self._wanted = False
+        self._process: subprocess.Popen | None = None
+        self._watch_id: int | None = None
+        self._device: str | None = None
+
+        self.audio_service.connect("notify::default-sink", self.on_default_sink)
+
+    def set_active(self, active: bool):
+        self._wanted = active
+        if active and self._process is None:
+            self.start()
+        elif not active and self._process is not None:
+            self.stop()
+
+    def start(self):
+        device = self.get_monitor_source()
+        if device is None:
+            return
+
+        try:
+            self._process = subprocess.Popen(
+                [
+                    "parec",
+                    f"--device={device}",
+                    "--format=float32le",
+                    f"--rate={SPECTRUM_SAMPLE_RATE}",
+                    "--channels=1",
+                    "--latency-msec=20",
+                    "--raw",
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except OSError as e:
+            logger.error(f"[SpectrumService] Failed to start parec: {e}")
+            return
+
+        self._device = device
+        self._chunk_filled = 0
+        GLib.unix_set_fd_nonblocking(self._process.stdout.fileno(), True)
+        self._watch_id = GLib.io_add_watch(
+            self._process.stdout.fileno(),
+            GLib.PRIORITY_DEFAULT,
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self.on_samples,
+        )
+        self.notify("active")
+
+    def stop(self):
+        if self._watch_id is not None:
+            GLib.source_remove(self._watch_id)
+            self._watch_id = None
+
+        if self._process is not None:
+            self._process.terminate()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+            self.notify("active")
+
+        self._device = None
+        self._samples.fill(0)
+        self.bands.fill(0)
+        self.updated()
+
+    def get_monitor_source(self) -> str | None:
+        sink = self.audio_service.default_sink
+        return sink.monitor_source_name if sink is not None else None
+
+    def on_default_sink(self, *args):
+        if not self._wanted:
+            return
+
+        # parec stays attached to the monitor it was started on
+        if self._process is not None and self.get_monitor_source() != self._device:
+            self.stop()
+        if self._process is None:
+            self.start()
+
+    def on_samples(self, fd, condition) -> bool:
+        stdout = self._process.stdout
+        analysed = False
+
+        while True:
+            read = stdout.readinto(self._chunk_bytes[self._chunk_filled :])
+            if read is None:
+                # drained the pipe
+                break
+            if read == 0:
+                logger.warning("[SpectrumService] parec exited")
+                self._watch_id = None
+                self.stop()
+                return False
+
+            self._chunk_filled += read
+            if self._chunk_filled == len(self._chunk_bytes):
+                self.analyse_chunk()
+                self._chunk_filled = 0
+                analysed = True
+
+        # a backlog of windows is still only drawn once
+        if analysed:
+            self.updated()
+
+        return True
+
+    def analyse_chunk(self):
+        samples = self._samples
+        samples[:-SPECTRUM_HOP_SIZE] = samples[SPECTRUM_HOP_SIZE:]
+        samples[-SPECTRUM_HOP_SIZE:] = self._chunk
+
+        np.multiply(samples, self._window, out=self._windowed)
+        np.abs(np.fft.rfft(self._windowed), out=self._magnitudes)
+
+        levels = np.maximum.reduceat(
+            self._magnitudes[: self._band_end], self._band_starts
+        )
+        levels *= self._magnitude_scale
+        np.maximum(levels, 1e-9, out=levels)
+
+        # decibels mapped so the floor is 0 and full scale is 1
+        np.log10(levels, out=levels)
+        levels *= 20.0 / -SPECTRUM_FLOOR_DB
+        levels += 1.0
+        np.clip(levels, 0.0, 1.0, out=levels)
+
+        # bars jump up immediately and fall back smoothly
+        self.bands *= SPECTRUM_DECAY
+        np.maximum(self.bands, levels, out=self.bands)
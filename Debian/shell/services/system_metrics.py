@@ -0,0 +1,179 @@
+import time
+
+from fabric.core.service import Service, Property, Signal
+from gi.repository import GLib
+
+from util.singleton import Singleton
+from util.proc_sampler import ProcSampler
+from util.disk_sampler import DiskSampler
+from util.gpu import GPUBackend, load_gpu_backend
+from util.ring_buffer import RingBuffer
+from config.system_metrics import (
+    SAMPLE_INTERVAL,
+    MAX_SAMPLE_INTERVAL,
+    SAMPLE_DEADBAND,
+    HISTORY_LENGTH,
+    DISK_MOUNT_POINTS,
+    DISK_DEVICES,
+    DISK_CAPACITY_INTERVAL,
+)
+
+METRICS = ("cpu", "gpu", "gpu_memory", "ram", "disk")
+
+
+class SystemMetricsService(Service, Singleton):
+    """
+    Samples every system metric in a single pass on one shared schedule,
+    widgets subscribe to the notify signal of the metric they display.
+
+    The schedule backs off while every reading stays within the deadband
+    and snaps back to the fast interval as soon as one moves.
+    """
+
+    @Signal
+    def sampled(self) -> None: ...
+
+    @Property(float, flags="readable")
+    def cpu(self) -> float:
+        return self._cpu
+
+    @Property(float, flags="readable")
+    def gpu(self) -> float:
+        return self._gpu
+
+    @Property(float, flags="readable")
+    def gpu_memory(self) -> float:
+        return self._gpu_memory
+
+    @Property(bool, default_value=False, flags="readable")
+    def gpu_available(self) -> bool:
+        return self._gpu_backend is not None and self._gpu_backend.available
+
+    @Property(float, flags="readable")
+    def ram(self) -> float:
+        return self._ram
+
+    @Property(float, flags="readable")
+    def disk(self) -> float:
+        return self._disk
+
+    @Property(object, flags="readable")
+    def disk_usage(self) -> dict[str, float]:
+        """Used capacity percentage by mount point."""
+        return self._disk_usage
+
+    @Property(object, flags="readable")
+    def disk_throughput(self) -> dict[str, tuple[float, float]]:
+        """Read and write bytes per second by block device."""
+        return self._disk_throughput
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self._sampler = ProcSampler()
+        self._disk_sampler = DiskSampler(DISK_MOUNT_POINTS, DISK_DEVICES)
+        # probed on the first sample so startup does not pay for it
+        self._gpu_backend: GPUBackend | None = None
+
+        self._cpu = 0.0
+        self._gpu = 0.0
+        self._gpu_memory = 0.0
+        self._ram = 0.0
+        self._disk = 0.0
+        self._disk_usage = {}
+        self._disk_throughput = {}
+
+        self._history = {metric: RingBuffer(HISTORY_LENGTH) for metric in METRICS}
+
+        self.sample_disk_capacity()
+        GLib.timeout_add_seconds(DISK_CAPACITY_INTERVAL, self.sample_disk_capacity)
+
+        if self._disk_sampler.mounts_fd is not None:
+            GLib.io_add_watch(
+                self._disk_sampler.mounts_fd,
+                GLib.PRIORITY_DEFAULT,
+                GLib.IOCondition.PRI | GLib.IOCondition.ERR,
+                self.on_mounts_changed,
+            )
+
+        self._interval = SAMPLE_INTERVAL
+        self._timeout_id = GLib.timeout_add(self._interval, self.sample)
+
+    def sample(self, *args) -> bool:
+        if self._gpu_backend is None:
+            self._gpu_backend = load_gpu_backend()
+            self.notify("gpu-available")
+
+        # bitwise or so every metric is updated
+        changed = self.update_metric("cpu", self._sampler.read_cpu_percent())
+        if self._gpu_backend.available:
+            changed |= self.update_metric("gpu", self._gpu_backend.read_usage())
+            changed |= self.update_metric(
+                "gpu_memory", self.get_gpu_memory_percent()
+            )
+        changed |= self.update_metric("ram", self._sampler.read_memory_percent())
+
+        disk_throughput = self._disk_sampler.read_throughput()
+        if disk_throughput != self._disk_throughput:
+            self._disk_throughput = disk_throughput
+            self.notify("disk-throughput")
+
+        self.sampled()
+
+        return self.reschedule(changed)
+
+    def sample_disk_capacity(self, *args) -> bool:
+        disk_usage = self._disk_sampler.read_capacity()
+        if disk_usage != self._disk_usage:
+            self._disk_usage = disk_usage
+            self.notify("disk-usage")
+
+        if DISK_MOUNT_POINTS:
+            self.update_metric("disk", disk_usage[DISK_MOUNT_POINTS[0]])
+
+        return True
+
+    def on_mounts_changed(self, *args) -> bool:
+        # reading the mount table acknowledges the change
+        self._disk_sampler.read_mounts()
+        self._disk_sampler.refresh_devices()
+        self.sample_disk_capacity()
+        return True
+
+    def get_history(self, metric: str) -> RingBuffer:
+        return self._history[metric]
+
+    def get_core_usage(self):
+        """Per-core cpu usage from the latest sample."""
+        return self._sampler.core_percents
+
+    def update_metric(self, name: str, value: float) -> bool:
+        """Publishes value if it moved beyond the deadband, returns whether it did."""
+        # timestamped since the sample interval backs off
+        self._history[name].append(value, time.monotonic())
+
+        attr = f"_{name}"
+        if abs(getattr(self, attr) - value) < SAMPLE_DEADBAND:
+            return False
+
+        setattr(self, attr, value)
+        self.notify(name.replace("_", "-"))
+        return True
+
+    def reschedule(self, changed: bool) -> bool:
+        if changed:
+            interval = SAMPLE_INTERVAL
+        else:
+            interval = min(self._interval * 2, MAX_SAMPLE_INTERVAL)
+
+        if interval == self._interval:
+            # keep the current timeout running
+            return True
+
+        self._interval = interval
+        self._timeout_id = GLib.timeout_add(interval, self.sample)
+        return False
+
+    def get_gpu_memory_percent(self) -> float:
+        used, total = self._gpu_backend.read_memory()
+        return 100.0 * used / total if total else 0.0
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+from pathlib import Path
+
+import aiohttp
+from loguru import logger
+
+from util.disk_cache import write_atomic, prune_directory
+
+CHUNK_SIZE = 64 * 1024
+
+
+def is_remote_url(url: str) -> bool:
+    return url.startswith(("http://", "https://"))
+
+
+class ArtFetcher:
+    """
+    Downloads remote album art through one pooled aiohttp session and
+    stores it content addressed by sha256. A url index maps art urls to
+    blobs, so a cover that was fetched once never touches the network
+    again and identical covers behind different urls share one file.
+
+    Only used from the event loop, disk writes go through a worker thread.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: int,
+        timeout: float,
+        connections: int,
+        cache_size: int,
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.connections = connections
+        self.cache_size = cache_size
+
+        self._blob_directory = directory / "blobs"
+        self._index_path = directory / "index.json"
+        self._index: dict[str, str] = self.load_index()
+
+        self._session: aiohttp.ClientSession | None = None
+        # concurrent requests for one url share a single download
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def load_index(self) -> dict[str, str]:
+        try:
+            with self._index_path.open("r") as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"[ArtFetcher] Discarding unreadable url index: {e}")
+            return {}
+
+    def save_index(self, index: dict[str, str]):
+        """Runs on a worker thread, entries for pruned blobs are dropped."""
+        index = {
+            url: digest
+            for url, digest in index.items()
+            if self.get_blob_path(digest).exists()
+        }
+        try:
+            write_atomic(self._index_path, json.dumps(index).encode())
+        except OSError as e:
+            logger.warning(f"[ArtFetcher] Failed to save url index: {e}")
+
+    def get_blob_path(self, digest: str) -> Path:
+        return self._blob_directory / digest
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.connections, ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str) -> Path | None:
+        """Local path of the art behind url, None if it could not be fetched."""
+        digest = self._index.get(url)
+        if digest is not None:
+            path = self.get_blob_path(digest)
+            if path.exists():
+                return path
+
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self.download(url))
+            self._pending[url] = task
+            task.add_done_callback(lambda _: self._pending.pop(url, None))
+
+        # one caller giving up does not cancel the download for the others
+        return await asyncio.shield(task)
+
+    async def download(self, url: str) -> Path | None:
+        data = bytearray()
+        try:
+            async with self.get_session().get(url) as response:
+                if response.status != 200:
+                    logger.warning(f"[ArtFetcher] {url} returned {response.status}")
+                    return None
+
+                if (
+                    response.content_length is not None
+                    and response.content_length > self.max_size
+                ):
+                    logger.warning(f"[ArtFetcher] {url} exceeds the size limit")
+                    return None
+
+                # the header can be missing or wrong, so count what arrives
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    data += chunk
+                    if len(data) > self.max_size:
+                        logger.warning(f"[ArtFetcher] {url} exceeds the size limit")
+                        return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"[ArtFetcher] Failed to fetch {url}: {e!r}")
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = await asyncio.to_thread(self.store, digest, bytes(data))
+        if path is None:
+            return None
+
+        self._index[url] = digest
+        await asyncio.to_thread(self.save_index, dict(self._index))
+        return path
+
+    def store(self, digest: str, data: bytes) -> Path | None:
+        """Runs on a worker thread."""
+        path = self.get_blob_path(digest)
+        if path.exists():
+            return path
+
+        try:
+            self._blob_directory.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, data)
+        except OSError as e:
+            logger.warning(f"[ArtFetcher] Failed to store art: {e}")
+            return None
+        return path
+
+    def prune(self):
+        """Runs on a worker thread, removes least recently fetched blobs over budget."""
+        try:
+            self._blob_directory.mkdir(parents=True, exist_ok=True)
+            prune_directory(self._blob_directory, self.cache_size)
+        except OSError as e:
+            logger.warning(f"[ArtFetcher] Failed to prune art cache: {e}")
@@ -0,0 +1,40 @@
+import os
+import threading
+from pathlib import Path
+
+
+def write_atomic(path: Path, data: bytes):
+    """Writes through a temporary file so readers never see a partial file."""
+    partial_path = path.with_name(f"{path.name}.{threading.get_ident()}.partial")
+    try:
+        partial_path.write_bytes(data)
+        os.replace(partial_path, path)
+    except OSError:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+
+def prune_directory(directory: Path, max_size: int) -> list[str]:
+    """
+    Removes the least recently modified files until the directory fits in
+    max_size bytes, returns the names of the removed files.
+    """
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.name))
+
+    removed = []
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(directory / name)
+        except OSError:
+            continue
+        total -= size
+        removed.append(name)
+
+    return removed
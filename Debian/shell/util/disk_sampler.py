@@ -0,0 +1,140 @@
+"""
+Disk capacity and throughput sampler. Capacity comes from statvfs and is
+meant to be read on a slow cadence, throughput comes from /proc/diskstats
+deltas and is cheap enough for every sample.
+"""
+import os
+import time
+
+from util.proc_sampler import BUFFER_SIZE, open_proc_file, read_proc_file
+
+
+SECTOR_SIZE = 512  # diskstats always counts 512 byte sectors
+
+# /proc/diskstats fields after split: major minor name reads ... sectors read
+DISKSTATS_NAME = 2
+DISKSTATS_SECTORS_READ = 5
+DISKSTATS_SECTORS_WRITTEN = 9
+
+VIRTUAL_DEVICE_PREFIXES = (b"loop", b"ram", b"zram")
+
+
+def get_capacity_percent(path: str) -> float:
+    try:
+        stats = os.statvfs(path)
+    except OSError:
+        return 0.0
+
+    # match psutil: reserved blocks count as neither used nor free
+    used = stats.f_blocks - stats.f_bfree
+    total = used + stats.f_bavail
+    if total == 0:
+        return 0.0
+
+    return 100.0 * used / total
+
+
+class DiskSampler:
+    def __init__(
+        self,
+        mount_points: list[str],
+        devices: list[str] | None = None,
+        proc_root: str = "/proc",
+        sysfs_root: str = "/sys",
+    ):
+        self.mount_points = mount_points
+        self.proc_root = proc_root
+        self.sysfs_root = sysfs_root
+
+        # None means every whole disk, found on the next throughput read
+        self._configured_devices = devices
+        self._devices = (
+            {device.encode() for device in devices} if devices is not None else None
+        )
+
+        self._buffer = bytearray(BUFFER_SIZE)
+
+        self._diskstats_fd = open_proc_file(os.path.join(proc_root, "diskstats"))
+        # pollable for mount table changes
+        self.mounts_fd = open_proc_file(os.path.join(proc_root, "self/mounts"))
+
+        self._counters: dict[str, tuple[int, int]] = {}
+        self._last_time = 0.0
+
+        # prime counters so the first sample is a real delta
+        self.read_throughput()
+
+    def read(self, fd: int) -> bytes:
+        return read_proc_file(fd, self._buffer)
+
+    def read_capacity(self) -> dict[str, float]:
+        """Returns used capacity percentage for every mount point."""
+        return {path: get_capacity_percent(path) for path in self.mount_points}
+
+    def read_mounts(self) -> bytes:
+        """Re-reads the mount table, acknowledging a pending change."""
+        if self.mounts_fd is None:
+            return b""
+        return self.read(self.mounts_fd)
+
+    def refresh_devices(self) -> None:
+        """Re-detects devices when none were configured, e.g. after a mount change."""
+        if self._configured_devices is None:
+            self._devices = None
+
+    def is_whole_disk(self, name: bytes) -> bool:
+        if name.startswith(VIRTUAL_DEVICE_PREFIXES):
+            return False
+
+        partition = os.path.join(
+            self.sysfs_root, "class/block", name.decode(), "partition"
+        )
+        return not os.path.exists(partition)
+
+    def read_throughput(self) -> dict[str, tuple[float, float]]:
+        """Returns (read, write) bytes per second for every device."""
+        if self._diskstats_fd is None:
+            return {}
+
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        self._last_time = now
+
+        if self._devices is None:
+            # only whole disks by default, partitions would double count
+            self._devices = {
+                line.split()[DISKSTATS_NAME]
+                for line in self.read(self._diskstats_fd).splitlines()
+                if self.is_whole_disk(line.split()[DISKSTATS_NAME])
+            }
+
+        throughput = {}
+        for line in self.read(self._diskstats_fd).splitlines():
+            fields = line.split()
+            if fields[DISKSTATS_NAME] not in self._devices:
+                continue
+
+            name = fields[DISKSTATS_NAME].decode()
+            read_bytes = int(fields[DISKSTATS_SECTORS_READ]) * SECTOR_SIZE
+            written_bytes = int(fields[DISKSTATS_SECTORS_WRITTEN]) * SECTOR_SIZE
+
+            last_read, last_written = self._counters.get(
+                name, (read_bytes, written_bytes)
+            )
+            self._counters[name] = (read_bytes, written_bytes)
+
+            if elapsed > 0:
+                throughput[name] = (
+                    (read_bytes - last_read) / elapsed,
+                    (written_bytes - last_written) / elapsed,
+                )
+
+        return throughput
+
+    def close(self) -> None:
+        for fd in (self._diskstats_fd, self.mounts_fd):
+            if fd is not None:
+                os.close(fd)
+
+        self._diskstats_fd = None
+        self.mounts_fd = None
@@ -0,0 +1,132 @@
+"""
+GPU metric backends. Use load_gpu_backend to pick the first backend that
+works on this machine, nothing is probed until it is called.
+"""
+import glob
+import os
+
+from loguru import logger
+
+
+class GPUBackend:
+    """Interface for GPU metric sources."""
+
+    name = "none"
+    available = True
+
+    def read_usage(self) -> float:
+        """Returns GPU utilization as a percentage."""
+        raise NotImplementedError()
+
+    def read_memory(self) -> tuple[int, int]:
+        """Returns (used, total) video memory in bytes."""
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class NullGPUBackend(GPUBackend):
+    """Used on machines without a supported GPU, hides GPU widgets."""
+
+    available = False
+
+    def read_usage(self) -> float:
+        return 0.0
+
+    def read_memory(self) -> tuple[int, int]:
+        return (0, 0)
+
+
+class NVMLBackend(GPUBackend):
+    """Reads NVIDIA GPUs through NVML with cached device handles."""
+
+    name = "nvml"
+
+    def __init__(self, device_index: int = 0):
+        import pynvml
+
+        self._nvml = pynvml
+        pynvml.nvmlInit()
+        self._handle = pynvml.nvmlDeviceGetHandleByIndex(device_index)
+
+    def read_usage(self) -> float:
+        return float(self._nvml.nvmlDeviceGetUtilizationRates(self._handle).gpu)
+
+    def read_memory(self) -> tuple[int, int]:
+        memory = self._nvml.nvmlDeviceGetMemoryInfo(self._handle)
+        return (memory.used, memory.total)
+
+    def close(self) -> None:
+        self._nvml.nvmlShutdown()
+
+
+class SysfsGPUBackend(GPUBackend):
+    """Reads AMD and Intel GPUs that expose gpu_busy_percent in sysfs."""
+
+    name = "sysfs"
+
+    def __init__(self, device_path: str):
+        self.device_path = device_path
+
+        self._busy_fd = os.open(
+            os.path.join(device_path, "gpu_busy_percent"), os.O_RDONLY | os.O_CLOEXEC
+        )
+        self._vram_used_fd = self.open_optional("mem_info_vram_used")
+        self._vram_total_fd = self.open_optional("mem_info_vram_total")
+
+    @classmethod
+    def find_device(cls, sysfs_root: str = "/sys") -> str | None:
+        pattern = os.path.join(sysfs_root, "class/drm/card*/device/gpu_busy_percent")
+        for path in sorted(glob.glob(pattern)):
+            return os.path.dirname(path)
+
+        return None
+
+    def open_optional(self, name: str) -> int | None:
+        try:
+            return os.open(
+                os.path.join(self.device_path, name), os.O_RDONLY | os.O_CLOEXEC
+            )
+        except OSError:
+            return None
+
+    def read_usage(self) -> float:
+        return float(os.pread(self._busy_fd, 16, 0))
+
+    def read_memory(self) -> tuple[int, int]:
+        if self._vram_used_fd is None or self._vram_total_fd is None:
+            return (0, 0)
+
+        return (
+            int(os.pread(self._vram_used_fd, 32, 0)),
+            int(os.pread(self._vram_total_fd, 32, 0)),
+        )
+
+    def close(self) -> None:
+        for fd in (self._busy_fd, self._vram_used_fd, self._vram_total_fd):
+            if fd is not None:
+                os.close(fd)
+
+
+def load_gpu_backend(sysfs_root: str = "/sys") -> GPUBackend:
+    try:
+        backend = NVMLBackend()
+    except Exception as e:
+        logger.debug(f"NVML unavailable: {e}")
+    else:
+        logger.info("Using NVML GPU backend.")
+        return backend
+
+    device_path = SysfsGPUBackend.find_device(sysfs_root)
+    if device_path is not None:
+        try:
+            backend = SysfsGPUBackend(device_path)
+        except OSError as e:
+            logger.debug(f"Could not open GPU sysfs device {device_path}: {e}")
+        else:
+            logger.info(f"Using sysfs GPU backend for {device_path}.")
+            return backend
+
+    logger.info("No supported GPU found, GPU metrics disabled.")
+    return NullGPUBackend()
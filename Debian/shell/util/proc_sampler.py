@@ -0,0 +1,154 @@
+"""
+Zero-dependency system metric sampler that reads /proc through persistent
+file descriptors. Point proc_root at a fixture directory to sample a
+synthetic system instead of the running machine.
+"""
+import os
+from array import array
+
+
+# initial read buffer size, grown when a file does not fit
+BUFFER_SIZE = 16384
+
+# /proc/stat cpu fields: user nice system idle iowait irq softirq steal
+CPU_IDLE_FIELDS = (3, 4)
+CPU_FIELD_COUNT = 8
+
+
+def open_proc_file(path: str) -> int | None:
+    try:
+        return os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+
+
+def read_proc_file(fd: int, buffer: bytearray) -> bytes:
+    """
+    Re-reads a proc file from the start. Multi record files such as
+    /proc/diskstats hand out about a page per read whatever the buffer
+    size, so reading continues from the offset reached until a read
+    returns nothing, doubling the buffer in place whenever it fills.
+    """
+    size = 0
+    while True:
+        if size == len(buffer):
+            buffer.extend(bytes(len(buffer)))
+
+        with memoryview(buffer)[size:] as view:
+            read = os.preadv(fd, [view], size)
+        if read == 0:
+            with memoryview(buffer)[:size] as view:
+                return view.tobytes()
+        size += read
+
+
+def parse_cpu_line(line: bytes) -> tuple[int, int]:
+    """Returns the (total, idle) jiffies of a /proc/stat cpu line."""
+    fields = line.split()
+    total = 0
+    for field in fields[1 : CPU_FIELD_COUNT + 1]:
+        total += int(field)
+
+    idle = 0
+    for index in CPU_IDLE_FIELDS:
+        idle += int(fields[index + 1])
+
+    return total, idle
+
+
+class ProcSampler:
+    def __init__(self, proc_root: str = "/proc"):
+        self.proc_root = proc_root
+
+        self._buffer = bytearray(BUFFER_SIZE)
+
+        self._stat_fd = open_proc_file(os.path.join(proc_root, "stat"))
+        self._meminfo_fd = open_proc_file(os.path.join(proc_root, "meminfo"))
+
+        # index 0 holds the aggregate cpu line, index n holds core n - 1
+        self._cpu_totals = array("Q")
+        self._cpu_idles = array("Q")
+        self.core_percents = array("f")
+
+        # prime cpu counters so the first sample is a real delta
+        if self._stat_fd is not None:
+            self.read_cpu_percent()
+
+    def read(self, fd: int) -> bytes:
+        """Re-read a proc file from the start into the shared buffer."""
+        return read_proc_file(fd, self._buffer)
+
+    def read_cpu_percent(self) -> float:
+        if self._stat_fd is None:
+            import psutil
+
+            return psutil.cpu_percent()
+
+        data = self.read(self._stat_fd)
+        # every cpu line comes out of the same read so cores stay consistent
+        end = data.find(b"intr")
+        lines = [
+            line
+            for line in data[: end if end != -1 else None].splitlines()
+            if line.startswith(b"cpu")
+        ]
+
+        if len(lines) != len(self._cpu_totals):
+            # first read or cpu hotplug, restart the deltas
+            self._cpu_totals = array("Q", bytes(8 * len(lines)))
+            self._cpu_idles = array("Q", bytes(8 * len(lines)))
+            self.core_percents = array("f", bytes(4 * (len(lines) - 1)))
+
+        totals = self._cpu_totals
+        idles = self._cpu_idles
+        percents = self.core_percents
+        percent = 0.0
+
+        for index, line in enumerate(lines):
+            total, idle = parse_cpu_line(line)
+            delta_total = total - totals[index]
+            delta_idle = idle - idles[index]
+            totals[index] = total
+            idles[index] = idle
+
+            if delta_total > 0:
+                value = 100.0 * (delta_total - delta_idle) / delta_total
+            else:
+                value = 0.0
+
+            if index == 0:
+                percent = value
+            else:
+                percents[index - 1] = value
+
+        return percent
+
+    def read_memory_percent(self) -> float:
+        if self._meminfo_fd is None:
+            import psutil
+
+            return psutil.virtual_memory().percent
+
+        total = None
+        available = None
+        for line in self.read(self._meminfo_fd).splitlines():
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1])
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1])
+
+            if total is not None and available is not None:
+                break
+
+        if not total or available is None:
+            return 0.0
+
+        return 100.0 * (total - available) / total
+
+    def close(self) -> None:
+        for fd in (self._stat_fd, self._meminfo_fd):
+            if fd is not None:
+                os.close(fd)
+
+        self._stat_fd = None
+        self._meminfo_fd = None
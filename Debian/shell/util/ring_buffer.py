@@ -0,0 +1,60 @@
+from array import array
+
+
+class RingBuffer:
+    """
+    Fixed capacity float ring buffer backed by a preallocated array, with
+    the time each sample was taken kept alongside it. Appends are O(1) and
+    never allocate, the oldest sample is overwritten once the buffer is full.
+    """
+
+    def __init__(self, capacity: int):
+        self._data = array("f", bytes(4 * capacity))
+        self._times = array("d", bytes(8 * capacity))
+        self._capacity = capacity
+        self._head = 0  # index the next sample is written to
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value: float, timestamp: float) -> None:
+        self._data[self._head] = value
+        self._times[self._head] = timestamp
+        self._head = (self._head + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+
+    def __iter__(self):
+        """Iterates from the oldest to the newest sample."""
+        data = self._data
+        start = (self._head - self._size) % self._capacity
+        for offset in range(self._size):
+            yield data[(start + offset) % self._capacity]
+
+    def items(self):
+        """Iterates (timestamp, value) pairs from the oldest to the newest."""
+        data = self._data
+        times = self._times
+        start = (self._head - self._size) % self._capacity
+        for offset in range(self._size):
+            index = (start + offset) % self._capacity
+            yield times[index], data[index]
+
+    def last(self) -> float:
+        if self._size == 0:
+            raise IndexError("last from empty ring buffer")
+        return self._data[self._head - 1]
+
+    def last_timestamp(self) -> float:
+        if self._size == 0:
+            raise IndexError("last_timestamp from empty ring buffer")
+        return self._times[self._head - 1]
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
@@ -1,210 +1,185 @@
 from fabric.widgets.circularprogressbar import CircularProgressBar
 
 
-from typing import cast
-from fabric import Service, Signal, Property
+from array import array
+from functools import cache
 from gi.repository import GLib, Gtk
 
 
-### CREDIT TO ITS_DARSH: https://github.com/its-darsh
-
-
-class Animator(Service):
-    @Signal
-    def finished(self) -> None: ...
+BEZIER_LUT_SIZE = 256
+BEZIER_NEWTON_ITERATIONS = 8
+BEZIER_EPSILON = 1e-7
+
+
+def bezier_component(p1: float, p2: float, t: float) -> float:
+    """One axis of a cubic bezier with fixed end points at 0 and 1."""
+    return 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t**2 * p2 + t**3
+
+
+def bezier_component_slope(p1: float, p2: float, t: float) -> float:
+    return 3 * (1 - t) ** 2 * p1 + 6 * (1 - t) * t * (p2 - p1) + 3 * t**2 * (1 - p2)
+
+
+def solve_bezier_t(x1: float, x2: float, x: float) -> float:
+    """Finds the curve parameter t whose x coordinate is x."""
+    t = x
+    for _ in range(BEZIER_NEWTON_ITERATIONS):
+        error = bezier_component(x1, x2, t) - x
+        if abs(error) < BEZIER_EPSILON:
+            return t
+        slope = bezier_component_slope(x1, x2, t)
+        if abs(slope) < BEZIER_EPSILON:
+            break
+        t -= error / slope
+
+    # newton stalled on a flat section, x(t) is monotonic so bisect instead
+    low, high = 0.0, 1.0
+    t = x
+    while high - low > BEZIER_EPSILON:
+        if bezier_component(x1, x2, t) < x:
+            low = t
+        else:
+            high = t
+        t = (low + high) / 2
+    return t
+
+
+@cache
+def get_bezier_lut(bezier_curve: tuple[float, float, float, float]) -> array:
+    """
+    Samples the eased progress of a css style cubic-bezier timing curve
+    at evenly spaced times, shared by every animation using the curve.
+    """
+    x1, y1, x2, y2 = bezier_curve
+    lut = array("d", bytes(8 * (BEZIER_LUT_SIZE + 1)))
+    for index in range(BEZIER_LUT_SIZE + 1):
+        t = solve_bezier_t(x1, x2, index / BEZIER_LUT_SIZE)
+        lut[index] = bezier_component(y1, y2, t)
+    return lut
+
+
+def ease_from_lut(lut: array, time: float) -> float:
+    # a clock running backwards would index from the end of the table
+    position = min(max(time, 0.0), 1.0) * BEZIER_LUT_SIZE
+    index = int(position)
+    if index >= BEZIER_LUT_SIZE:
+        return lut[BEZIER_LUT_SIZE]
+
+    start = lut[index]
+    return start + (lut[index + 1] - start) * (position - index)
+
+
+class Tween:
+    __slots__ = ("start", "end", "start_time", "duration", "bezier_lut")
+
+    def __init__(self, start, end, start_time, duration, bezier_lut):
+        self.start = start
+        self.end = end
+        self.start_time = start_time
+        self.duration = duration
+        self.bezier_lut = bezier_lut
+
+
+class AnimationDriver:
+    """
+    Advances every running value animation of one window from a single
+    frame clock tick callback. The callback is only attached while
+    something is animating.
+    """
+
+    _drivers: dict[Gtk.Window, "AnimationDriver"] = {}
+
+    @classmethod
+    def get_for_widget(cls, widget: Gtk.Widget) -> "AnimationDriver | None":
+        window = widget.get_toplevel()
+        if not isinstance(window, Gtk.Window):
+            # not in a window yet, nothing to tick against
+            return None
+
+        driver = cls._drivers.get(window)
+        if driver is None:
+            driver = cls._drivers[window] = cls(window)
+            window.connect("destroy", lambda *_: cls._drivers.pop(window, None))
+        return driver
+
+    def __init__(self, window: Gtk.Window):
+        self._window = window
+        self._tweens: dict[CircularProgressBar, Tween] = {}
+        self._tick_handler = None
 
-    @Property(tuple[float, float, float, float], "read-write")
-    def bezier_curve(self) -> tuple[float, float, float, float]:
-        return self._bezier_curve
+    def get_time_now(self) -> float:
+        frame_clock = self._window.get_frame_clock()
+        if frame_clock is not None:
+            return frame_clock.get_frame_time() / 1_000_000
+        return GLib.get_monotonic_time() / 1_000_000
 
-    @bezier_curve.setter
-    def bezier_curve(self, value: tuple[float, float, float, float]):
-        self._bezier_curve = value
-        return
+    def animate(
+        self,
+        widget: CircularProgressBar,
+        value: float,
+        duration: float,
+        bezier_curve: tuple[float, float, float, float],
+    ) -> None:
+        if widget.value == value:
+            self._tweens.pop(widget, None)
+            return
 
-    @Property(float, "read-write")
-    def value(self):
-        return self._value
+        self._tweens[widget] = Tween(
+            widget.value,
+            value,
+            self.get_time_now(),
+            duration,
+            get_bezier_lut(bezier_curve),
+        )
 
-    @value.setter
-    def value(self, value: float):
-        self._value = value
-        return
+        if self._tick_handler is None:
+            self._tick_handler = self._window.add_tick_callback(self.do_handle_tick)
 
-    @Property(float, "read-write")
-    def max_value(self):
-        return self._max_value
+    def do_handle_tick(self, window, frame_clock) -> bool:
+        now = frame_clock.get_frame_time() / 1_000_000
 
-    @max_value.setter
-    def max_value(self, value: float):
-        self._max_value = value
-        return
+        finished = []
+        for widget, tween in self._tweens.items():
+            # hidden widgets skip straight to their target
+            if not widget.get_mapped():
+                widget.set_value(tween.end)
+                finished.append(widget)
+                continue
 
-    @Property(float, "read-write")
-    def min_value(self):
-        return self._min_value
+            position = min(1.0, (now - tween.start_time) / tween.duration)
+            eased = ease_from_lut(tween.bezier_lut, position)
+            widget.set_value(tween.start + (tween.end - tween.start) * eased)
 
-    @min_value.setter
-    def min_value(self, value: float):
-        self._min_value = value
-        return
+            if position >= 1.0:
+                finished.append(widget)
 
-    @Property(bool, "read-write", default_value=False)
-    def playing(self):
-        return self._playing
+        for widget in finished:
+            del self._tweens[widget]
 
-    @playing.setter
-    def playing(self, value: bool):
-        self._playing = value
-        return
+        if self._tweens:
+            return True
 
-    @Property(bool, "read-write", default_value=False)
-    def repeat(self):
-        return self._repeat
+        self._tick_handler = None
+        return False
 
-    @repeat.setter
-    def repeat(self, value: bool):
-        self._repeat = value
-        return
 
+class AnimatedCircularProgressBar(CircularProgressBar):
     def __init__(
         self,
-        bezier_curve: tuple[float, float, float, float],
-        duration: float,
-        min_value: float = 0.0,
-        max_value: float = 1.0,
-        repeat: bool = False,
-        tick_widget: Gtk.Widget | None = None,
+        # edit the following parameters to customize the animation
+        bezier_curve: tuple[float, float, float, float] = (0.5, 0.0, 0.5, 1.0),
+        duration: float = 0.5,
         **kwargs,
     ):
         super().__init__(**kwargs)
-        self._bezier_curve = (1, 0, 1, 1)
-        self._duration = 5
-        self._value = 0.0
-        self._min_value = 0.0
-        self._max_value = 1.0
-        self._repeat = False
-
         self.bezier_curve = bezier_curve
         self.duration = duration
-        self.value = min_value
-        self.min_value = min_value
-        self.max_value = max_value
-        self.repeat = repeat
-
-        self.playing = False
-        self._start_time = None
-        self._tick_handler = None
-        self._timeline_pos = 0
-        self._tick_widget = tick_widget
-
-    def do_get_time_now(self):
-        return GLib.get_monotonic_time() / 1_000_000
-
-    def do_lerp(self, start: float, end: float, time: float) -> float:
-        return start + (end - start) * time
-
-    def do_interpolate_cubic_bezier(self, time: float) -> float:
-        y_points = (0, self.bezier_curve[1], self.bezier_curve[3], 1)
-        return (
-            (1 - time) ** 3 * y_points[0]
-            + 3 * (1 - time) ** 2 * time * y_points[1]
-            + 3 * (1 - time) * time**2 * y_points[2]
-            + time**3 * y_points[3]
-        )
-
-    def do_ease(self, time: float) -> float:
-        return self.do_lerp(
-            self.min_value, self.max_value, self.do_interpolate_cubic_bezier(time)
-        )
-
-    def do_update_value(self, delta_time: float):
-        if not self.playing:
-            return
-
-        elapsed_time = delta_time - cast(float, self._start_time)
-
-        self._timeline_pos = min(1, elapsed_time / self.duration)
-
-        self.value = self.do_ease(self._timeline_pos)
-
-        if not self._timeline_pos >= 1:
-            return
-
-        if not self.repeat:
-            self.value = self.max_value
-            self.finished()
-            self.pause()
-            return
-
-        self._start_time = delta_time
-        self._timeline_pos = 0
-        return
-
-    def do_handle_tick(self, *_):
-        current_time = self.do_get_time_now()
-        self.do_update_value(current_time)
-        return True
-
-    def do_remove_tick_handlers(self):
-        if self._tick_handler:
-            if self._tick_widget:
-                self._tick_widget.remove_tick_callback(self._tick_handler)
-            else:
-                GLib.source_remove(self._tick_handler)
-        self._tick_handler = None
-        return
 
-    def play(self):
-        if self.playing:
-            return
-
-        self._start_time = self.do_get_time_now()
-
-        if not self._tick_handler:
-            if self._tick_widget:
-                self._tick_handler = self._tick_widget.add_tick_callback(
-                    self.do_handle_tick
-                )
-            else:
-                self._tick_handler = GLib.timeout_add(16, self.do_handle_tick)
-
-        self.playing = True
-        return
-
-    def pause(self):
-        self.playing = False
-        return self.do_remove_tick_handlers()
-
-    def stop(self):
-        if not self._tick_handler:
-            self._timeline_pos = 0
-            self.playing = False
+    def animate_value(self, value: float):
+        driver = AnimationDriver.get_for_widget(self)
+        if driver is None or not self.get_mapped():
+            self.set_value(value)
             return
-        return self.do_remove_tick_handlers()
-
 
-class AnimatedCircularProgressBar(CircularProgressBar):
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.animator = (
-            Animator(
-                # edit the following parameters to customize the animation
-                bezier_curve=(0.5, 0.0, 0.5, 1.0),
-                duration=0.5,
-                min_value=self.min_value,
-                max_value=self.value,
-                tick_widget=self,
-                notify_value=lambda p, *_: self.set_value(p.value),
-            )
-            .build()
-            .play()
-            .unwrap()
-        )
-
-    def animate_value(self, value: float):
-        self.animator.pause()
-        self.animator.min_value = self.value
-        self.animator.max_value = value
-        self.animator.play()
+        driver.animate(self, value, self.duration, self.bezier_curve)
         return
@@ -0,0 +1,52 @@
+import cairo
+from typing import Callable, Sequence
+from fabric.widgets.widget import Widget
+from gi.repository import Gtk
+
+
+class CoreHeatmap(Gtk.DrawingArea, Widget):
+    """
+    Draws one cell per cpu core in a single row, cell opacity follows
+    the core's load. All cores share one draw call.
+    """
+
+    def __init__(
+        self,
+        get_values: Callable[[], Sequence[float]],
+        max_value: float = 100.0,
+        spacing: float = 2.0,
+        **kwargs,
+    ):
+        Gtk.DrawingArea.__init__(self)
+        Widget.__init__(self, **kwargs)
+
+        self.get_values = get_values
+        self.max_value = max_value
+        self.spacing = spacing
+
+    def refresh(self) -> None:
+        # nothing to redraw while hidden
+        if self.get_mapped():
+            self.queue_draw()
+
+    def do_draw(self, cr: cairo.Context):
+        values: Sequence[float] = self.get_values()
+        count = len(values)
+        if count == 0:
+            return
+
+        width = self.get_allocated_width()
+        height = self.get_allocated_height()
+        color = self.get_style_context().get_color(Gtk.StateFlags.NORMAL)
+
+        cell_width = (width - self.spacing * (count - 1)) / count
+        step = cell_width + self.spacing
+
+        for index, value in enumerate(values):
+            load = min(value, self.max_value) / self.max_value
+            # keep idle cores faintly visible
+            cr.set_source_rgba(
+                color.red, color.green, color.blue, 0.15 + 0.85 * load
+            )
+            cr.rectangle(index * step, 0, cell_width, height)
+            cr.fill()
@@ -0,0 +1,69 @@
+import cairo
+from fabric.widgets.widget import Widget
+from gi.repository import Gtk
+
+from util.ring_buffer import RingBuffer
+
+
+class Sparkline(Gtk.DrawingArea, Widget):
+    """
+    Draws a line graph directly from a RingBuffer. Samples are placed by
+    the time they were taken, the newest sits on the right edge and span
+    seconds before it on the left, so uneven sampling keeps its shape.
+    """
+
+    def __init__(
+        self,
+        buffer: RingBuffer,
+        span: float,
+        max_value: float = 100.0,
+        line_width: float = 2.0,
+        **kwargs,
+    ):
+        Gtk.DrawingArea.__init__(self)
+        Widget.__init__(self, **kwargs)
+
+        self.buffer = buffer
+        self.span = span
+        self.max_value = max_value
+        self.line_width = line_width
+
+    def refresh(self) -> None:
+        # nothing to redraw while hidden
+        if self.get_mapped():
+            self.queue_draw()
+
+    def do_draw(self, cr: cairo.Context):
+        count = len(self.buffer)
+        if count < 2:
+            return
+
+        width = self.get_allocated_width()
+        height = self.get_allocated_height()
+        color = self.get_style_context().get_color(Gtk.StateFlags.NORMAL)
+
+        newest = self.buffer.last_timestamp()
+        x_scale = width / self.span
+        scale = (height - self.line_width) / self.max_value
+        baseline = height - self.line_width / 2
+
+        # samples older than the span land left of the edge and are clipped,
+        # which keeps the line running into the edge
+        start_x = None
+        for timestamp, value in self.buffer.items():
+            x = width - (newest - timestamp) * x_scale
+            if start_x is None:
+                start_x = x
+            cr.line_to(x, baseline - min(value, self.max_value) * scale)
+
+        cr.set_source_rgba(color.red, color.green, color.blue, color.alpha)
+        cr.set_line_width(self.line_width)
+        cr.set_line_join(cairo.LINE_JOIN_ROUND)
+        cr.stroke_preserve()
+
+        # close the line down to the baseline for a translucent fill
+        cr.line_to(width, baseline)
+        cr.line_to(start_x, baseline)
+        cr.close_path()
+        cr.set_source_rgba(color.red, color.green, color.blue, 0.25)
+        cr.fill()
@@ -0,0 +1,49 @@
+import cairo
+from typing import Sequence
+from fabric.widgets.widget import Widget
+from gi.repository import Gtk
+
+
+class Spectrum(Gtk.DrawingArea, Widget):
+    """
+    Draws one bar per band rising from the bottom edge, bar heights are
+    levels between 0 and 1. All bars are filled with a single fill.
+    """
+
+    def __init__(
+        self,
+        bands: Sequence[float],
+        spacing: float = 2.0,
+        **kwargs,
+    ):
+        Gtk.DrawingArea.__init__(self)
+        Widget.__init__(self, **kwargs)
+
+        self.bands = bands
+        self.spacing = spacing
+
+    def refresh(self, *args) -> None:
+        # nothing to redraw while hidden
+        if self.get_mapped():
+            self.queue_draw()
+
+    def do_draw(self, cr: cairo.Context):
+        count = len(self.bands)
+        if count == 0:
+            return
+
+        width = self.get_allocated_width()
+        height = self.get_allocated_height()
+        color = self.get_style_context().get_color(Gtk.StateFlags.NORMAL)
+
+        bar_width = (width - self.spacing * (count - 1)) / count
+        step = bar_width + self.spacing
+
+        x = 0.0
+        for level in self.bands:
+            bar_height = max(float(level) * height, 1.0)
+            cr.rectangle(x, height - bar_height, bar_width, bar_height)
+            x += step
+
+        cr.set_source_rgba(color.red, color.green, color.blue, color.alpha)
+        cr.fill()